@@ -0,0 +1,85 @@
+"""
+Cached ranked candidate lists behind opaque search cursors.
+
+The first paginated search ranks up to SEARCH_CANDIDATES documents once and
+stores their ids and scores here; later pages are slices of that list. An
+entry is only valid for the index generation it was ranked against and for
+SEARCH_CURSOR_TTL_S seconds. At most SEARCH_CURSOR_MAX entries are kept (LRU).
+"""
+from __future__ import annotations
+
+import base64
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Tuple
+
+import numpy as np
+
+
+class InvalidCursor(Exception):
+    """
+    The cursor cannot be used. expired=True: it timed out or the index changed
+    since it was issued. expired=False: it is malformed or belongs to a
+    different query or filters (a client error).
+    """
+
+    def __init__(self, message: str, expired: bool = False):
+        super().__init__(message)
+        self.expired = expired
+
+
+class CursorCache:
+    def __init__(self, ttl_s: float = 600.0, max_entries: int = 256):
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Hashable, int, float, np.ndarray, np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def put(self, key: Hashable, generation: int, doc_ids: np.ndarray, scores: np.ndarray) -> str:
+        entry_id = secrets.token_urlsafe(9)
+        with self._lock:
+            self._entries[entry_id] = (key, generation, time.monotonic(), doc_ids, scores)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry_id
+
+    def get(self, cursor: str, key: Hashable, generation: int) -> Tuple[str, int, np.ndarray, np.ndarray]:
+        """Resolve a cursor to (entry id, offset, doc ids, scores) or raise InvalidCursor."""
+        entry_id, offset = decode(cursor)
+        with self._lock:
+            entry = self._entries.get(entry_id)
+            if entry is None:
+                raise InvalidCursor("cursor expired", expired=True)
+            entry_key, entry_gen, created, doc_ids, scores = entry
+            if time.monotonic() - created > self.ttl_s:
+                del self._entries[entry_id]
+                raise InvalidCursor("cursor expired", expired=True)
+            if entry_gen != generation:
+                del self._entries[entry_id]
+                raise InvalidCursor("index changed since the cursor was issued", expired=True)
+            if entry_key != key:
+                raise InvalidCursor("cursor belongs to a different query or filters")
+            self._entries.move_to_end(entry_id)
+        return entry_id, offset, doc_ids, scores
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def encode(entry_id: str, offset: int) -> str:
+    return base64.urlsafe_b64encode(f"{entry_id}:{offset}".encode()).decode().rstrip("=")
+
+
+def decode(cursor: str) -> Tuple[str, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        entry_id, offset = raw.rsplit(":", 1)
+        return entry_id, max(0, int(offset))
+    except Exception:
+        raise InvalidCursor("malformed cursor")
@@ -1,9 +1,29 @@
-from sentence_transformers import SentenceTransformer
+import threading
 
 
 class Embedder:
-    def __init__(self):
-        self.model = SentenceTransformer("all-MiniLM-L6-v2")
+    """
+    sentence-transformers (and torch) are imported on first use, not at
+    import time; call load() from a background thread to warm it up.
+    """
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+        self.model_name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+
+                    self._model = SentenceTransformer(self.model_name)
+        return self._model
+
+    @property
+    def model(self):
+        return self.load()
 
     def embed(self, texts):
         if isinstance(texts, str):
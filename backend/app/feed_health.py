@@ -0,0 +1,192 @@
+"""
+Per-feed health state for ingestion: latency, failures and a circuit breaker.
+
+Every feed fetch records one attempt (latency and outcome) against its
+FeedSource. After FEED_BREAKER_FAILURES consecutive failed fetches the breaker
+opens and the feed is skipped for FEED_BREAKER_COOLDOWN_S seconds. Once the
+cooldown has passed, a single trial fetch is let through ("half_open"). If it
+succeeds the breaker closes; if it fails the breaker opens again for twice
+the previous cooldown, capped at FEED_BREAKER_MAX_COOLDOWN_S.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, Dict, List, Optional
+
+import numpy as np
+
+from app.models import FeedSource
+from app import metrics
+
+BREAKER_FAILURES = int(os.getenv("FEED_BREAKER_FAILURES", "3"))
+BREAKER_COOLDOWN_S = float(os.getenv("FEED_BREAKER_COOLDOWN_S", "300"))
+BREAKER_MAX_COOLDOWN_S = float(os.getenv("FEED_BREAKER_MAX_COOLDOWN_S", "3600"))
+
+LATENCY_WINDOW = 50  # recent fetch latencies kept per feed for the report
+
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    if ts is None:
+        return None
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
+
+
+class _FeedState:
+    __slots__ = (
+        "name",
+        "url",
+        "attempts",
+        "failures",
+        "consecutive_failures",
+        "skipped",
+        "page_failures",
+        "latencies",
+        "last_error",
+        "last_success",
+        "last_failure",
+        "open_until",
+        "cooldown_s",
+        "trial",
+    )
+
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.url = url
+        self.attempts = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.skipped = 0  # fetches avoided while the breaker was open
+        self.page_failures = 0  # article page fetches that failed for this feed
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.last_error: Optional[str] = None
+        self.last_success: Optional[float] = None
+        self.last_failure: Optional[float] = None
+        self.open_until: Optional[float] = None  # wall clock; None = breaker closed
+        self.cooldown_s = BREAKER_COOLDOWN_S
+        self.trial = False  # a half-open trial fetch is in flight
+
+    def state(self, now: float) -> str:
+        if self.open_until is None:
+            return "closed"
+        return "open" if now < self.open_until else "half_open"
+
+
+class FeedHealth:
+    def __init__(
+        self,
+        failure_threshold: int = BREAKER_FAILURES,
+        cooldown_s: float = BREAKER_COOLDOWN_S,
+        max_cooldown_s: float = BREAKER_MAX_COOLDOWN_S,
+    ):
+        self.failure_threshold = failure_threshold
+        self.cooldown_s = cooldown_s
+        self.max_cooldown_s = max_cooldown_s
+        self._feeds: Dict[str, _FeedState] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, feed: FeedSource) -> _FeedState:
+        st = self._feeds.get(feed.url)
+        if st is None:
+            st = self._feeds[feed.url] = _FeedState(feed.name, feed.url)
+            st.cooldown_s = self.cooldown_s
+        return st
+
+    def allow(self, feed: FeedSource) -> bool:
+        """False while the feed's breaker is open; lets one trial through after the cooldown."""
+        now = time.time()
+        with self._lock:
+            st = self._get(feed)
+            state = st.state(now)
+            if state == "closed":
+                return True
+            if state == "half_open" and not st.trial:
+                st.trial = True
+                return True
+            st.skipped += 1
+        metrics.inc("feed_skipped_total", feed=feed.name)
+        return False
+
+    def record_success(self, feed: FeedSource, seconds: float):
+        with self._lock:
+            st = self._get(feed)
+            st.attempts += 1
+            st.latencies.append(seconds)
+            st.consecutive_failures = 0
+            st.last_success = time.time()
+            st.open_until = None
+            st.cooldown_s = self.cooldown_s
+            st.trial = False
+        metrics.set_gauge("feed_breaker_open", 0, feed=feed.name)
+
+    def record_failure(self, feed: FeedSource, seconds: float, error: str):
+        now = time.time()
+        with self._lock:
+            st = self._get(feed)
+            st.attempts += 1
+            st.failures += 1
+            st.consecutive_failures += 1
+            st.latencies.append(seconds)
+            st.last_error = error
+            st.last_failure = now
+
+            opened = False
+            if st.trial:
+                # Failed half-open trial: back off harder
+                st.cooldown_s = min(st.cooldown_s * 2, self.max_cooldown_s)
+                st.open_until = now + st.cooldown_s
+                st.trial = False
+                opened = True
+            elif st.open_until is None and st.consecutive_failures >= self.failure_threshold:
+                st.open_until = now + st.cooldown_s
+                opened = True
+
+        metrics.inc("feed_errors_total", feed=feed.name)
+        if opened:
+            metrics.inc("feed_breaker_opened_total", feed=feed.name)
+            metrics.set_gauge("feed_breaker_open", 1, feed=feed.name)
+
+    def record_page_failure(self, feed: FeedSource):
+        with self._lock:
+            self._get(feed).page_failures += 1
+
+    def reset(self):
+        with self._lock:
+            self._feeds.clear()
+
+    def report(self, feeds: Optional[List[FeedSource]] = None) -> List[Dict]:
+        """Per-feed latency and failure summary, worst failure rate first."""
+        now = time.time()
+        with self._lock:
+            if feeds is None:
+                states = list(self._feeds.values())
+            else:
+                states = [self._get(f) for f in {f.url: f for f in feeds}.values()]
+
+            rows = []
+            for st in states:
+                lat = np.array(st.latencies, dtype=np.float64) * 1000.0
+                rows.append(
+                    {
+                        "name": st.name,
+                        "url": st.url,
+                        "state": st.state(now),
+                        "attempts": st.attempts,
+                        "failures": st.failures,
+                        "failure_rate": st.failures / st.attempts if st.attempts else 0.0,
+                        "consecutive_failures": st.consecutive_failures,
+                        "skipped": st.skipped,
+                        "page_failures": st.page_failures,
+                        "latency_ms_avg": float(lat.mean()) if lat.size else None,
+                        "latency_ms_p95": float(np.percentile(lat, 95)) if lat.size else None,
+                        "last_error": st.last_error,
+                        "last_success": _iso(st.last_success),
+                        "last_failure": _iso(st.last_failure),
+                        "open_until": _iso(st.open_until),
+                    }
+                )
+        rows.sort(key=lambda r: (-r["failure_rate"], r["name"]))
+        return rows
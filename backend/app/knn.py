@@ -0,0 +1,116 @@
+"""
+Document k-nearest-neighbour graph for "related articles".
+
+Each document owns one fixed-width row of neighbour ids (int64, -1 = empty)
+and cosine scores (float32), kept in two dense arrays addressed through a
+doc_id -> slot map. New documents get a full row when they are indexed;
+existing rows are only updated when a new document beats their current
+worst neighbour, so ingest cost is O(new x corpus) and lookups are O(k).
+"""
+from __future__ import annotations
+
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+
+
+def top_k(ids: np.ndarray, scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Row-wise top-k of (ids, scores) matrices, best first."""
+    if scores.shape[1] > k:
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        ids = np.take_along_axis(ids, part, axis=1)
+        scores = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-scores, axis=1, kind="stable")
+    return np.take_along_axis(ids, order, axis=1), np.take_along_axis(scores, order, axis=1)
+
+
+class KnnGraph:
+    def __init__(self, k: int = 20):
+        self.k = k
+        self._ids = np.full((0, k), -1, dtype=np.int64)
+        self._scores = np.full((0, k), -np.inf, dtype=np.float32)
+        self._slot: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._slot)
+
+    @property
+    def nbytes(self) -> int:
+        return self._ids.nbytes + self._scores.nbytes
+
+    def neighbours(self, doc_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        slot = self._slot.get(int(doc_id))
+        if slot is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        ids, scores = self._ids[slot], self._scores[slot]
+        valid = (ids >= 0) & np.isfinite(scores)
+        return ids[valid], scores[valid]
+
+    def set_rows(self, doc_ids: np.ndarray, ids: np.ndarray, scores: np.ndarray):
+        """Store complete neighbour rows for newly indexed documents."""
+        ids, scores = self._pad(ids, scores)
+        start = self._ids.shape[0]
+        self._ids = np.vstack([self._ids, ids])
+        self._scores = np.vstack([self._scores, scores.astype(np.float32)])
+        for i, d in enumerate(doc_ids.tolist()):
+            self._slot[int(d)] = start + i
+
+    def offer(self, doc_ids: np.ndarray, cand_ids: np.ndarray, cand_scores: np.ndarray):
+        """Merge candidate neighbours into the rows of existing documents."""
+        slots = np.array([self._slot.get(int(d), -1) for d in doc_ids], dtype=np.int64)
+        have = slots >= 0
+        if not have.any():
+            return
+        slots, cand_ids, cand_scores = slots[have], cand_ids[have], cand_scores[have]
+
+        # Skip rows where no candidate beats the current worst neighbour
+        worst = self._scores[slots, -1]
+        improves = (cand_scores > worst[:, None]).any(axis=1)
+        if not improves.any():
+            return
+        slots, cand_ids, cand_scores = slots[improves], cand_ids[improves], cand_scores[improves]
+
+        ids, scores = top_k(
+            np.hstack([self._ids[slots], cand_ids]),
+            np.hstack([self._scores[slots], cand_scores.astype(np.float32)]),
+            self.k,
+        )
+        self._ids[slots] = ids
+        self._scores[slots] = scores
+
+    def replace_rows(self, doc_ids: np.ndarray, ids: np.ndarray, scores: np.ndarray):
+        """Overwrite the complete neighbour rows of existing documents."""
+        ids, scores = self._pad(ids, scores)
+        slots = np.array([self._slot[int(d)] for d in doc_ids], dtype=np.int64)
+        self._ids[slots] = ids
+        self._scores[slots] = scores.astype(np.float32)
+
+    def remove(self, doc_ids: Iterable[int]) -> np.ndarray:
+        """
+        Drop documents and every edge pointing at them, compacting the arrays.
+        Returns the surviving documents that lost a neighbour (see replace_rows).
+        """
+        gone = np.fromiter((int(d) for d in doc_ids), dtype=np.int64)
+        if gone.size == 0:
+            return np.empty(0, dtype=np.int64)
+        gone_set = set(gone.tolist())
+        kept = [(d, s) for d, s in sorted(self._slot.items(), key=lambda x: x[1]) if d not in gone_set]
+        keep_slots = np.array([s for _, s in kept], dtype=np.int64)
+
+        ids = self._ids[keep_slots]
+        scores = self._scores[keep_slots]
+        dead = np.isin(ids, gone)
+        ids[dead] = -1
+        scores[dead] = -np.inf
+        self._ids, self._scores = top_k(ids, scores, self.k)
+        self._slot = {d: i for i, (d, _) in enumerate(kept)}
+        return np.array([d for d, _ in kept], dtype=np.int64)[dead.any(axis=1)]
+
+    def _pad(self, ids: np.ndarray, scores: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        if ids.shape[1] >= self.k:
+            return ids[:, : self.k], scores[:, : self.k]
+        pad = self.k - ids.shape[1]
+        return (
+            np.hstack([ids, np.full((ids.shape[0], pad), -1, dtype=np.int64)]),
+            np.hstack([scores, np.full((scores.shape[0], pad), -np.inf, dtype=scores.dtype)]),
+        )
@@ -1,6 +1,16 @@
-from fastapi import FastAPI, HTTPException
+# Imported first so startup timings include the framework imports below.
+from app import startup
+
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from app.models import TrendsRequest, TrendsResponse, MapRequest, MapResponse, MapPoint, DailyCount
+from fastapi.responses import JSONResponse, PlainTextResponse
+from app.models import TrendsRequest, TrendsResponse, MapRequest, MapResponse, DailyCount
 
 from app.models import (
     IngestRequest,
@@ -9,14 +19,93 @@ from app.models import (
     SearchResponse,
     SearchResult,
     StatsResponse,
+    FeedHealthResponse,
+    RelatedRequest,
+    RelatedResponse,
 )
 from app.sources import get_topics, get_topic_by_key
-from app.scraping import ingest_from_feeds
-from app.store import VectorStore
+from app.scraping import ingest_from_feeds, feed_health
+from app.store import VectorStore, warm_up
+from app.cursors import InvalidCursor
+from app.serialization import json_response
+from app import metrics
+
+VECTORSTORE_PATH = os.getenv("VECTORSTORE_PATH", "./data/vectorstore.joblib")
+
+store = VectorStore()
+
+
+def _load_store():
+    try:
+        store.load(VECTORSTORE_PATH)
+    except Exception:
+        # Unreadable file: keep it for inspection and start empty instead of never becoming ready
+        metrics.inc("persist_load_errors_total")
+        store.reset()
+        os.replace(VECTORSTORE_PATH, f"{VECTORSTORE_PATH}.corrupt-{int(time.time())}")
+
+
+# Saves run off the request path in one writer thread; requests arriving
+# while it writes are coalesced into a single follow-up save.
+_persist_lock = threading.Lock()
+_persist_pending = False
+_persist_thread: Optional[threading.Thread] = None
+
+
+def _persist():
+    global _persist_pending, _persist_thread
+    with _persist_lock:
+        _persist_pending = True
+        if _persist_thread is not None and _persist_thread.is_alive():
+            return
+        _persist_thread = threading.Thread(target=_persist_worker, name="persist", daemon=True)
+        _persist_thread.start()
+
+
+def _persist_worker():
+    global _persist_pending
+    while True:
+        with _persist_lock:
+            if not _persist_pending:
+                return
+            _persist_pending = False
+        try:
+            with metrics.span("persist"):
+                store.save(VECTORSTORE_PATH)
+        except Exception:
+            metrics.inc("persist_errors_total")
+
+
+def _require_ready():
+    # Writes before the persisted store is loaded would be overwritten by (or overwrite) it
+    if not startup.is_ready():
+        raise HTTPException(
+            status_code=503,
+            detail="Store is still loading; retry once /ready returns 200",
+            headers={"Retry-After": "5"},
+        )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    startup.mark_imported()
+    # Heavy imports and the persisted store load in the background;
+    # /health answers immediately, /ready flips once this is done.
+    startup.start_background([
+        ("import_sklearn", warm_up),
+        ("load_store", _load_store),
+    ])
+    yield
+    # Let a pending save finish on shutdown
+    t = _persist_thread
+    if t is not None:
+        t.join()
+
 
 app = FastAPI(
     title="AI News & Research Recommender",
     version="0.4.1",
+    lifespan=lifespan,
 )
 
 # Adjust if needed
@@ -31,21 +120,63 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
-store = VectorStore()
+
+app.add_middleware(startup.FirstRequestMiddleware)
+
+
+async def server_timing(request: Request, call_next):
+    token = metrics.begin_request()
+    t0 = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        spans = metrics.end_request(token)
+    elapsed = time.perf_counter() - t0
+
+    route = request.scope.get("route")
+    path = getattr(route, "path", None) or "unmatched"
+    metrics.observe("http_request", elapsed, method=request.method, path=path)
+    response.headers["Server-Timing"] = metrics.server_timing_header(spans, total=elapsed)
+    return response
+
+
+# BaseHTTPMiddleware wraps every response, so only install it when metrics are on
+if metrics.ENABLED:
+    app.middleware("http")(server_timing)
+
 
 @app.post("/reset")
 def reset():
+    _require_ready()
     store.reset()
+    _persist()
     return {"status": "ok", "total_indexed": store.total()}
 
 
 @app.get("/health")
 def health():
+    # Liveness only; see /ready for readiness
     return {"status": "ok"}
 
 
+@app.get("/ready")
+def ready():
+    snap = startup.snapshot()
+    snap["status"] = "ready" if snap["ready"] else "starting"
+    snap["total_indexed"] = store.total()
+    return JSONResponse(snap, status_code=200 if snap["ready"] else 503)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    if not metrics.ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (METRICS_ENABLED=0)")
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/topics")
 def topics():
     return {"topics": [t.model_dump() for t in get_topics()]}
@@ -53,56 +184,121 @@ def topics():
 
 @app.get("/stats", response_model=StatsResponse)
 def stats():
-    return StatsResponse(total_indexed=store.total())
+    return StatsResponse(total_indexed=store.total(), index=store.index_stats())
+
+
+@app.get("/feeds/health", response_model=FeedHealthResponse)
+def feeds_health(topic_key: Optional[str] = None):
+    # All feeds fetched so far, or every feed of one topic (including never-fetched ones)
+    feeds = None
+    if topic_key:
+        topic = get_topic_by_key(topic_key)
+        if not topic:
+            raise HTTPException(status_code=404, detail=f"Unknown topic_key: {topic_key}")
+        feeds = topic.feeds
+    return FeedHealthResponse(feeds=feed_health.report(feeds))
 
 
 @app.post("/trends", response_model=TrendsResponse)
 def trends(req: TrendsRequest):
-    data = store.trends(days=req.days, top_n=req.top_n, sources=req.sources)
+    with metrics.span("trends"):
+        data = store.trends(days=req.days, top_n=req.top_n, sources=req.sources, mode=req.mode)
     # Pydantic will validate/shape it via TrendsResponse
     return data
 
 
 @app.post("/map", response_model=MapResponse)
-def map_2d(req: MapRequest):
-    data = store.map_2d(k=req.k, query=req.query, days=req.days, sources=req.sources)
-    return {
-        "total_indexed": store.total(),
-        "points": [MapPoint(**p) for p in data["points"]],
-        "query_point": data["query_point"],
-    }
+def map_2d(req: MapRequest, request: Request):
+    with metrics.span("map"):
+        data = store.map_2d(k=req.k, query=req.query, days=req.days, sources=req.sources, layout=req.layout)
+    # Trusted internal data: serialize directly instead of validating through MapResponse
+    with metrics.span("serialize"):
+        return json_response(
+            request,
+            {
+                "total_indexed": store.total(),
+                "points": data["points"],
+                "columns": data.get("columns"),
+                "query_point": data["query_point"],
+            },
+        )
 
 
 @app.post("/ingest", response_model=IngestResponse)
 def ingest(req: IngestRequest):
+    _require_ready()
     topic = get_topic_by_key(req.topic_key)
     if not topic:
         raise HTTPException(status_code=404, detail=f"Unknown topic_key: {req.topic_key}")
 
-    articles = ingest_from_feeds(topic.feeds, per_feed_limit=req.per_feed_limit)
-    added = store.add_many(articles)
+    with metrics.span("fetch"):
+        articles = ingest_from_feeds(topic.feeds, per_feed_limit=req.per_feed_limit)
+    with metrics.span("index"):
+        added = store.add_many(articles)
+    if added:
+        _persist()
 
     return IngestResponse(added=added, total_indexed=store.total())
 
 
 @app.post("/search", response_model=SearchResponse)
-def search(req: SearchRequest):
-    results = store.search(req.query, k=req.k, days=req.days, sources=req.sources)
-    return SearchResponse(
+def search(req: SearchRequest, request: Request):
+    next_cursor = None
+    total_candidates = None
+    if req.paginate or req.cursor:
+        try:
+            results, next_cursor, total_candidates = store.search_page(
+                req.query,
+                k=req.k,
+                days=req.days,
+                sources=req.sources,
+                collapse_stories=req.collapse_stories,
+                cursor=req.cursor,
+            )
+        except InvalidCursor as e:
+            if e.expired:
+                raise HTTPException(status_code=410, detail=f"Cursor no longer valid ({e}); rerun the search without a cursor")
+            raise HTTPException(status_code=400, detail=f"Invalid cursor ({e})")
+    else:
+        results = store.search(
+            req.query,
+            k=req.k,
+            days=req.days,
+            sources=req.sources,
+            collapse_stories=req.collapse_stories,
+        )
+    # Trusted internal data: serialize directly instead of validating through SearchResponse
+    with metrics.span("serialize"):
+        return json_response(
+            request,
+            {
+                "total_indexed": store.total(),
+                "results": results,
+                "next_cursor": next_cursor,
+                "total_candidates": total_candidates,
+            },
+        )
+
+
+@app.post("/related", response_model=RelatedResponse)
+def related(req: RelatedRequest):
+    with metrics.span("related"):
+        results = store.related(req.url, k=req.k, days=req.days, sources=req.sources)
+    if results is None:
+        raise HTTPException(status_code=404, detail=f"URL is not indexed: {req.url}")
+    return RelatedResponse(
+        url=req.url,
         total_indexed=store.total(),
         results=[SearchResult(**r) for r in results],
     )
 
 
-
-
 from pathlib import Path
-import os
 from datetime import datetime
 
 @app.get("/persist-info")
 def persist_info():
-    path = Path(os.getenv("VECTORSTORE_PATH", "./data/vectorstore.joblib"))
+    path = Path(VECTORSTORE_PATH)
     exists = path.exists()
     mtime = datetime.fromtimestamp(path.stat().st_mtime).isoformat() if exists else None
 
@@ -0,0 +1,213 @@
+"""
+Lightweight in-process instrumentation for the hot paths.
+
+- span(name, **labels): times a block, aggregates count/sum per (name, labels)
+  and, inside a request, records the duration for the Server-Timing header.
+- inc(name, **labels): monotonically increasing counter.
+- set_gauge(name, value, **labels): last-value gauge.
+
+Everything is a no-op when METRICS_ENABLED=0, so the calls can stay in the
+hot paths.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+PREFIX = "app_"
+
+_Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+_lock = threading.Lock()
+_timings: Dict[_Key, List[float]] = {}  # key -> [count, sum_seconds, max_seconds]
+_counters: Dict[_Key, float] = {}
+_gauges: Dict[_Key, float] = {}
+
+# Per-request span collector (set by the HTTP middleware)
+_request_spans: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_spans", default=None)
+
+
+def _key(name: str, labels: Dict[str, object]) -> _Key:
+    if not labels:
+        return (name, ())
+    return (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+
+
+def observe(name: str, seconds: float, **labels) -> None:
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        t = _timings.get(key)
+        if t is None:
+            _timings[key] = [1, seconds, seconds]
+        else:
+            t[0] += 1
+            t[1] += seconds
+            if seconds > t[2]:
+                t[2] = seconds
+
+    spans = _request_spans.get()
+    if spans is not None:
+        spans[name] = spans.get(name, 0.0) + seconds
+
+
+def inc(name: str, value: float = 1.0, **labels) -> None:
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0.0) + value
+
+
+def set_gauge(name: str, value: float, **labels) -> None:
+    if not ENABLED:
+        return
+    with _lock:
+        _gauges[_key(name, labels)] = float(value)
+
+
+class _Span:
+    __slots__ = ("name", "labels", "t0")
+
+    def __init__(self, name: str, labels: Dict[str, object]):
+        self.name = name
+        self.labels = labels
+        self.t0 = 0.0
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe(self.name, time.perf_counter() - self.t0, **self.labels)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str, **labels):
+    if not ENABLED:
+        return _NULL_SPAN
+    return _Span(name, labels)
+
+
+# -------------------------
+# Request scope (Server-Timing)
+# -------------------------
+def begin_request():
+    """Start collecting spans for the current request; returns a reset token."""
+    if not ENABLED:
+        return None
+    return _request_spans.set({})
+
+
+def end_request(token) -> Dict[str, float]:
+    if token is None:
+        return {}
+    spans = _request_spans.get() or {}
+    _request_spans.reset(token)
+    return spans
+
+
+def server_timing_header(spans: Dict[str, float], total: Optional[float] = None) -> str:
+    parts = [f"{name};dur={secs * 1000.0:.2f}" for name, secs in spans.items()]
+    if total is not None:
+        parts.append(f"total;dur={total * 1000.0:.2f}")
+    return ", ".join(parts)
+
+
+# -------------------------
+# Process gauges
+# -------------------------
+def _resident_memory_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            rss_pages = int(f.read().split()[1])
+        return rss_pages * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        pass
+    try:
+        import resource
+        import sys
+
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KiB, macOS reports bytes
+        return int(maxrss) if sys.platform == "darwin" else int(maxrss) * 1024
+    except Exception:
+        return None
+
+
+# -------------------------
+# Prometheus text exposition
+# -------------------------
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def render_prometheus() -> str:
+    rss = _resident_memory_bytes()
+    if rss is not None:
+        set_gauge("process_resident_memory_bytes", rss)
+
+    with _lock:
+        timings = {k: list(v) for k, v in _timings.items()}
+        counters = dict(_counters)
+        gauges = dict(_gauges)
+
+    lines: List[str] = []
+
+    by_name: Dict[str, List[Tuple[Tuple[Tuple[str, str], ...], List[float]]]] = {}
+    for (name, labels), v in timings.items():
+        by_name.setdefault(name, []).append((labels, v))
+    for name in sorted(by_name):
+        metric = f"{PREFIX}{name}_seconds"
+        lines.append(f"# TYPE {metric} summary")
+        for labels, (count, total, _mx) in sorted(by_name[name]):
+            lbl = _fmt_labels(labels)
+            lines.append(f"{metric}_count{lbl} {int(count)}")
+            lines.append(f"{metric}_sum{lbl} {total:.6f}")
+        lines.append(f"# TYPE {metric}_max gauge")
+        for labels, (_count, _total, mx) in sorted(by_name[name]):
+            lines.append(f"{metric}_max{_fmt_labels(labels)} {mx:.6f}")
+
+    for kind, values in (("counter", counters), ("gauge", gauges)):
+        names: Dict[str, List[Tuple[Tuple[Tuple[str, str], ...], float]]] = {}
+        for (name, labels), v in values.items():
+            names.setdefault(name, []).append((labels, v))
+        for name in sorted(names):
+            metric = f"{PREFIX}{name}"
+            lines.append(f"# TYPE {metric} {kind}")
+            for labels, v in sorted(names[name]):
+                lines.append(f"{metric}{_fmt_labels(labels)} {v:g}")
+
+    return "\n".join(lines) + "\n"
+
+
+def reset() -> None:
+    with _lock:
+        _timings.clear()
+        _counters.clear()
+        _gauges.clear()
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Literal
 
 
 class Article(BaseModel):
@@ -39,6 +39,11 @@ class SearchRequest(BaseModel):
     # Optional filters (safe defaults)
     days: Optional[int] = Field(None, ge=1, le=365, description="Only include items published in last N days")
     sources: Optional[List[str]] = Field(None, description="Only include these source names")
+    collapse_stories: bool = Field(False, description="Return only the best article of each story cluster")
+    # Cursor pagination: set paginate on the first call, then pass back next_cursor
+    # with the same query and filters to get the following pages.
+    paginate: bool = Field(False, description="Return a next_cursor for further pages")
+    cursor: Optional[str] = Field(None, description="next_cursor from a previous page")
 
 
 class SearchResult(BaseModel):
@@ -49,15 +54,73 @@ class SearchResult(BaseModel):
     score: float
     # Phase 1.2 “Why it matches”
     why: Optional[List[str]] = None
+    # Story cluster the article belongs to and its size
+    story_id: Optional[int] = None
+    story_size: Optional[int] = None
 
 
 class SearchResponse(BaseModel):
     total_indexed: int
     results: List[SearchResult]
+    next_cursor: Optional[str] = None
+    total_candidates: Optional[int] = None
+
+
+class RelatedRequest(BaseModel):
+    url: str = Field(..., min_length=1, description="URL of an indexed article")
+    k: int = Field(8, ge=1, le=20)
+    days: Optional[int] = Field(None, ge=1, le=365, description="Only include items published in last N days")
+    sources: Optional[List[str]] = Field(None, description="Only include these source names")
+
+
+class RelatedResponse(BaseModel):
+    url: str
+    total_indexed: int
+    results: List[SearchResult]
+
+
+class IndexStats(BaseModel):
+    documents: int
+    segments: int
+    compact: bool  # INDEX_COMPACT
+    dtype: str  # value dtype of the count matrices and weights
+    min_df: int
+    max_df: float
+    vocabulary_size: int  # hashed features present in at least one document
+    weighted_vocabulary_size: int  # features left with non-zero IDF after df pruning
+    matrix_nnz: int  # stored entries (body + title counts)
+    matrix_bytes: int  # data + indices + indptr of all segments
+    approx_bytes: int  # text + matrix entries + kNN graph + story leaders (retention budget)
+    map_bytes: int
+    knn_graph_bytes: int
+    story_leader_bytes: int
 
 
 class StatsResponse(BaseModel):
     total_indexed: int
+    index: Optional[IndexStats] = None
+
+
+class FeedHealthItem(BaseModel):
+    name: str
+    url: str
+    state: Literal["closed", "open", "half_open"]  # circuit breaker state
+    attempts: int
+    failures: int
+    failure_rate: float
+    consecutive_failures: int
+    skipped: int  # fetches skipped while the breaker was open
+    page_failures: int  # failed article page fetches
+    latency_ms_avg: Optional[float] = None  # over the last 50 fetches
+    latency_ms_p95: Optional[float] = None
+    last_error: Optional[str] = None
+    last_success: Optional[str] = None
+    last_failure: Optional[str] = None
+    open_until: Optional[str] = None
+
+
+class FeedHealthResponse(BaseModel):
+    feeds: List[FeedHealthItem]
 
 
 # ----------------------------
@@ -67,6 +130,8 @@ class TrendsRequest(BaseModel):
     days: int = Field(7, ge=1, le=365)
     top_n: int = Field(12, ge=3, le=50)
     sources: Optional[List[str]] = None  # optional source filter
+    # "stories" ranks story clusters instead of tokenizing keywords
+    mode: Literal["keywords", "stories"] = "keywords"
 
 
 class DailyCount(BaseModel):
@@ -74,12 +139,33 @@ class DailyCount(BaseModel):
     count: int
 
 
+class SourceCount(BaseModel):
+    source: str
+    count: int
+
+
+class KeywordCount(BaseModel):
+    term: str
+    count: int
+
+
+class TopStory(BaseModel):
+    story_id: int
+    count: int  # articles in the window
+    # latest article of the story
+    title: str
+    url: str
+    source: str
+    published: Optional[str] = None
+
+
 class TrendsResponse(BaseModel):
     days: int
     total_items: int
     by_day: List[DailyCount]
-    top_sources: List[Dict[str, int]]  # [{"source": "...", "count": 12}, ...]
-    top_keywords: List[Dict[str, int]]  # [{"term": "...", "count": 18}, ...]
+    top_sources: List[SourceCount]
+    top_keywords: List[KeywordCount]
+    top_stories: List[TopStory] = []
 
 
 # ----------------------------
@@ -91,6 +177,8 @@ class MapRequest(BaseModel):
     k: int = Field(150, ge=20, le=1000)
     sources: Optional[List[str]] = None
     days: Optional[int] = Field(None, ge=1, le=365)
+    # "columns" returns parallel arrays (smaller and faster to encode than one object per point)
+    layout: Literal["rows", "columns"] = "rows"
 
 
 class MapPoint(BaseModel):
@@ -102,7 +190,17 @@ class MapPoint(BaseModel):
     published: Optional[str] = None
 
 
+class MapColumns(BaseModel):
+    x: List[float]
+    y: List[float]
+    title: List[str]
+    url: List[str]
+    source: List[str]
+    published: List[Optional[str]]
+
+
 class MapResponse(BaseModel):
     total_indexed: int
-    points: List[MapPoint]
+    points: List[MapPoint] = []
+    columns: Optional[MapColumns] = None  # set when layout="columns"
     query_point: Optional[Dict[str, float]] = None  # {"x":..., "y":...}
@@ -1,18 +1,104 @@
+import os
+import random
 import re
 import time
-from typing import List
+from typing import List, Mapping, Optional, Tuple
 from datetime import datetime
 
 import feedparser
 import requests
+import urllib3
 from bs4 import BeautifulSoup
 
 from app.models import Article, FeedSource
+from app.feed_health import FeedHealth
+from app import metrics
 
 
 UA = "ai-news-research-recommender/1.0 (+local)"
 HEADERS = {"User-Agent": UA, "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8"}
 
+# (connect, read) timeouts; the read timeout applies per socket read, so each
+# fetch is also capped by a total deadline to stop slow-drip responses.
+FEED_TIMEOUT = (float(os.getenv("FEED_CONNECT_TIMEOUT_S", "5")), float(os.getenv("FEED_READ_TIMEOUT_S", "10")))
+FEED_DEADLINE_S = float(os.getenv("FEED_DEADLINE_S", "20"))
+PAGE_TIMEOUT = (FEED_TIMEOUT[0], float(os.getenv("PAGE_READ_TIMEOUT_S", "8")))
+PAGE_DEADLINE_S = float(os.getenv("PAGE_DEADLINE_S", "12"))
+
+# Retries after the first attempt, with full-jitter exponential backoff
+FEED_RETRIES = int(os.getenv("FEED_RETRIES", "2"))
+FEED_BACKOFF_S = float(os.getenv("FEED_BACKOFF_S", "0.5"))
+
+# Stop fetching article pages for a feed after this many consecutive failures in one ingest
+PAGE_FAILURE_LIMIT = int(os.getenv("PAGE_FAILURE_LIMIT", "3"))
+
+feed_health = FeedHealth()
+
+
+class FetchError(Exception):
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+def _fetch(url: str, timeout: Tuple[float, float], deadline_s: float) -> Tuple[bytes, str, Mapping[str, str]]:
+    """
+    GET a URL with connect/read timeouts and a total deadline. Returns
+    (body, final URL after redirects, case-insensitive response headers);
+    raises FetchError.
+    """
+    start = time.monotonic()
+    deadline_error = FetchError(f"deadline of {deadline_s:g}s exceeded")
+    try:
+        with requests.get(url, headers=HEADERS, timeout=timeout, stream=True) as resp:
+            if resp.status_code >= 400:
+                retryable = resp.status_code == 429 or resp.status_code >= 500
+                raise FetchError(f"HTTP {resp.status_code}", retryable=retryable)
+            conn = getattr(resp.raw, "connection", None)
+            body = bytearray()
+            while True:
+                remaining = deadline_s - (time.monotonic() - start)
+                if remaining <= 0:
+                    raise deadline_error
+                # No single socket read may outlast the deadline ...
+                if conn is not None and conn.sock is not None:
+                    conn.sock.settimeout(min(timeout[1], remaining))
+                # ... and read1 returns whatever one read yields instead of filling a buffer
+                chunk = resp.raw.read1(65536, decode_content=True)
+                if not chunk:
+                    break
+                body += chunk
+            return bytes(body), resp.url, resp.headers
+    except (requests.Timeout, urllib3.exceptions.TimeoutError):
+        if time.monotonic() - start >= deadline_s:
+            raise deadline_error
+        raise FetchError("timeout")
+    except (requests.RequestException, urllib3.exceptions.HTTPError) as e:
+        raise FetchError(type(e).__name__)
+
+
+def _fetch_feed(feed: FeedSource):
+    """Fetch and parse one feed, retrying transient failures with jittered backoff."""
+    for attempt in range(FEED_RETRIES + 1):
+        try:
+            body, final_url, headers = _fetch(feed.url, FEED_TIMEOUT, FEED_DEADLINE_S)
+            # Base URL for relative entry links and the declared charset, as parse(url) would see them
+            parsed = feedparser.parse(
+                body,
+                response_headers={
+                    "content-location": final_url,
+                    "content-type": headers.get("Content-Type", ""),
+                },
+            )
+            if getattr(parsed, "bozo", 0) and not parsed.entries:
+                raise FetchError("unparseable feed", retryable=False)
+            return parsed
+        except FetchError as e:
+            if not e.retryable or attempt == FEED_RETRIES:
+                raise
+            metrics.inc("feed_retries_total", feed=feed.name)
+            time.sleep(random.uniform(0, FEED_BACKOFF_S * (2 ** attempt)))
+
 
 def _clean_text(s: str) -> str:
     s = (s or "").strip()
@@ -35,31 +121,47 @@ def _summarize(text: str, max_chars: int = 320) -> str:
     return text[: max_chars - 3].rstrip() + "..."
 
 
-def _extract_article_text(url: str, timeout: int = 12) -> str:
+def _extract_article_text(url: str, timeout: Tuple[float, float] = PAGE_TIMEOUT) -> Optional[str]:
+    """Main text of an article page, or None if the page could not be fetched."""
     try:
-        resp = requests.get(url, headers=HEADERS, timeout=timeout)
-        resp.raise_for_status()
-    except Exception:
-        return ""
+        with metrics.span("page_fetch"):
+            html, _, _ = _fetch(url, timeout, PAGE_DEADLINE_S)
+    except FetchError:
+        metrics.inc("page_fetch_errors_total")
+        return None
 
-    soup = BeautifulSoup(resp.text, "html.parser")
+    with metrics.span("html_parse"):
+        soup = BeautifulSoup(html, "html.parser")
 
-    # Remove junk
-    for tag in soup(["script", "style", "nav", "footer", "header", "aside"]):
-        tag.decompose()
+        # Remove junk
+        for tag in soup(["script", "style", "nav", "footer", "header", "aside"]):
+            tag.decompose()
 
-    # Prefer paragraphs
-    paras = [p.get_text(" ", strip=True) for p in soup.find_all("p")]
-    text = " ".join([p for p in paras if p])
-    return _clean_text(text)
+        # Prefer paragraphs
+        paras = [p.get_text(" ", strip=True) for p in soup.find_all("p")]
+        text = " ".join([p for p in paras if p])
+        return _clean_text(text)
 
 
 def ingest_from_feeds(feeds: List[FeedSource], per_feed_limit: int = 10) -> List[Article]:
     articles: List[Article] = []
 
     for feed in feeds:
-        parsed = feedparser.parse(feed.url)
+        if not feed_health.allow(feed):
+            continue
+
+        start = time.perf_counter()
+        try:
+            with metrics.span("feed_fetch", feed=feed.name):
+                parsed = _fetch_feed(feed)
+        except FetchError as e:
+            feed_health.record_failure(feed, time.perf_counter() - start, str(e))
+            continue
+        feed_health.record_success(feed, time.perf_counter() - start)
+
         entries = parsed.entries[:per_feed_limit]
+        metrics.inc("feed_entries_total", len(entries), feed=feed.name)
+        page_failures = 0
 
         for e in entries:
             title = _clean_text(getattr(e, "title", "") or "")
@@ -80,12 +182,19 @@ def ingest_from_feeds(feeds: List[FeedSource], per_feed_limit: int = 10) -> List
             # Many RSS feeds already include a good summary/abstract
             rss_summary = _clean_text(getattr(e, "summary", "") or "")
 
-            text = ""
+            text = rss_summary
             # If summary is too short, try fetching the page
-            if len(rss_summary) < 200:
-                text = _extract_article_text(url)
-            else:
-                text = rss_summary
+            if len(rss_summary) < 200 and page_failures < PAGE_FAILURE_LIMIT:
+                page_text = _extract_article_text(url)
+                if page_text is None:
+                    page_failures += 1
+                    feed_health.record_page_failure(feed)
+                else:
+                    page_failures = 0
+                    text = page_text
+
+                # be polite to websites
+                time.sleep(0.2)
 
             summary = _summarize(text)
 
@@ -100,7 +209,4 @@ def ingest_from_feeds(feeds: List[FeedSource], per_feed_limit: int = 10) -> List
                 )
             )
 
-            # be polite to websites
-            time.sleep(0.2)
-
     return articles
@@ -0,0 +1,171 @@
+"""
+Time-partitioned, immutable index segments.
+
+Articles are bucketed by publish time (SEGMENT_SPAN_DAYS, default 1 day).
+Each ingest writes one new small segment ("run") per bucket it touches and
+segments are never modified afterwards; merge() combines the runs of a
+bucket into a single segment, LSM-style. Segments hold raw term counts in a
+fixed hashed feature space, so IDF weighting is applied at query time and
+adding documents never rewrites older segments.
+"""
+from __future__ import annotations
+
+import math
+from datetime import datetime, timezone
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+from app.models import Article
+
+UNKNOWN_BUCKET = "unknown"
+
+
+def bucket_key(ts: float, span_days: int) -> str:
+    """Bucket id for a publish timestamp: the ISO date the bucket starts on."""
+    if ts is None or math.isnan(ts):
+        return UNKNOWN_BUCKET
+    span = max(1, int(span_days)) * 86400
+    start = math.floor(ts / span) * span
+    return datetime.fromtimestamp(start, tz=timezone.utc).date().isoformat()
+
+
+class Segment:
+    __slots__ = (
+        "bucket",
+        "articles",
+        "doc_ids",
+        "ts",
+        "sources",
+        "counts",
+        "title_counts",
+        "min_ts",
+        "max_ts",
+        "source_set",
+        "row_bytes",
+        "pruned",
+        "_norms",
+    )
+
+    def __init__(
+        self,
+        bucket: str,
+        articles: Sequence[Article],
+        doc_ids: np.ndarray,
+        ts: np.ndarray,
+        counts: sp.csr_matrix,
+        title_counts: sp.csr_matrix,
+        pruned: bool = False,
+    ):
+        self.bucket = bucket
+        self.articles: Tuple[Article, ...] = tuple(articles)
+        self.doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        self.ts = np.asarray(ts, dtype=np.float64)
+        self.sources = np.array([a.source for a in self.articles], dtype=object)
+        self.counts = counts
+        self.title_counts = title_counts
+        # True once rare-term entries were dropped (VectorStore._prune_segment)
+        self.pruned = pruned
+
+        known = self.ts[~np.isnan(self.ts)]
+        self.min_ts = float(known.min()) if known.size else math.nan
+        self.max_ts = float(known.max()) if known.size else math.nan
+        self.source_set = frozenset(self.sources.tolist())
+
+        # Approximate resident size per row (text + sparse entries), used for memory budgets
+        entry = counts.data.itemsize + counts.indices.itemsize
+        text_bytes = np.array(
+            [len(a.title) + len(a.url) + len(a.text or "") + len(a.summary or "") for a in self.articles],
+            dtype=np.int64,
+        )
+        self.row_bytes = text_bytes + (np.diff(counts.indptr) + np.diff(title_counts.indptr)) * entry + 16
+
+        # (generation, doc_norms, title_norms) under the IDF of that generation
+        self._norms: Optional[Tuple[int, np.ndarray, np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return len(self.articles)
+
+    @property
+    def nbytes(self) -> int:
+        total = self.doc_ids.nbytes + self.ts.nbytes
+        for m in (self.counts, self.title_counts):
+            total += m.data.nbytes + m.indices.nbytes + m.indptr.nbytes
+        return total
+
+    @property
+    def approx_bytes(self) -> int:
+        return int(self.row_bytes.sum())
+
+    def take(self, rows: np.ndarray) -> "Segment":
+        """New segment holding only the given rows (used by compaction)."""
+        return Segment(
+            bucket=self.bucket,
+            articles=[self.articles[int(r)] for r in rows],
+            doc_ids=self.doc_ids[rows],
+            ts=self.ts[rows],
+            counts=self.counts[rows],
+            title_counts=self.title_counts[rows],
+            pruned=self.pruned,
+        )
+
+    # -------------------------
+    # Pruning
+    # -------------------------
+    def may_match(self, cutoff_ts: Optional[float], sources: Optional[List[str]]) -> bool:
+        if sources and self.source_set.isdisjoint(sources):
+            return False
+        if cutoff_ts is not None:
+            # Unknown publish dates never pass a days filter
+            if math.isnan(self.max_ts) or self.max_ts < cutoff_ts:
+                return False
+        return True
+
+    def row_mask(self, cutoff_ts: Optional[float], sources: Optional[List[str]]) -> Optional[np.ndarray]:
+        """Boolean mask of rows passing the filters, or None if every row passes."""
+        mask = None
+        if cutoff_ts is not None and not (self.min_ts >= cutoff_ts and not np.isnan(self.ts).any()):
+            with np.errstate(invalid="ignore"):
+                mask = self.ts >= cutoff_ts
+        if sources and not self.source_set.issubset(sources):
+            src_mask = np.isin(self.sources, list(sources))
+            mask = src_mask if mask is None else (mask & src_mask)
+        return mask
+
+    # -------------------------
+    # Weighting
+    # -------------------------
+    def norms(self, generation: int, idf: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """L2 norms of the TF-IDF rows (body, title) under the given IDF."""
+        cached = self._norms
+        if cached is not None and cached[0] == generation:
+            return cached[1], cached[2]
+        doc_norms = _weighted_row_norms(self.counts, idf)
+        title_norms = _weighted_row_norms(self.title_counts, idf)
+        self._norms = (generation, doc_norms, title_norms)
+        return doc_norms, title_norms
+
+
+def _weighted_row_norms(m: sp.csr_matrix, idf: np.ndarray) -> np.ndarray:
+    w = m.copy()
+    w.data = (w.data * idf[w.indices]) ** 2
+    return np.sqrt(np.asarray(w.sum(axis=1)).ravel())
+
+
+def merge(segments: Sequence[Segment], bucket: Optional[str] = None) -> Segment:
+    """Combine segments into one, by default keeping the bucket of the first."""
+    segs = sorted(segments, key=lambda s: int(s.doc_ids[0]) if len(s) else 0)
+    return Segment(
+        bucket=bucket or segs[0].bucket,
+        articles=[a for s in segs for a in s.articles],
+        doc_ids=np.concatenate([s.doc_ids for s in segs]),
+        ts=np.concatenate([s.ts for s in segs]),
+        counts=sp.vstack([s.counts for s in segs], format="csr"),
+        title_counts=sp.vstack([s.title_counts for s in segs], format="csr"),
+        pruned=any(s.pruned for s in segs),
+    )
+
+
+def sort_key(seg: Segment):
+    return (seg.bucket, int(seg.doc_ids[0]) if len(seg) else 0)
@@ -0,0 +1,69 @@
+"""
+Fast JSON path for large, trusted payloads (/map, /search).
+
+Handlers build plain dicts/lists and return a pre-serialized Response, which
+skips FastAPI's response_model validation and jsonable_encoder pass. orjson
+is used when installed, otherwise the stdlib json module. Bodies above
+RESPONSE_COMPRESS_MIN_BYTES are compressed with brotli (if installed) or gzip,
+negotiated through Accept-Encoding.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import os
+from typing import Any, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+try:  # optional, ~5-10x faster than json.dumps
+    import orjson
+except ImportError:
+    orjson = None
+
+try:  # optional
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION = os.getenv("RESPONSE_COMPRESSION", "1") == "1"
+COMPRESS_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESS_MIN_BYTES", "1024"))
+# Level 1 is ~2x cheaper than 5-6 and within ~10% of their size on JSON
+GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "1"))
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _accepted(accept_encoding: str) -> set:
+    out = set()
+    for part in (accept_encoding or "").split(","):
+        token, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0"):
+            continue
+        if token:
+            out.add(token.strip().lower())
+    return out
+
+
+def compress(body: bytes, accept_encoding: str) -> Tuple[bytes, Optional[str]]:
+    if not COMPRESSION or len(body) < COMPRESS_MIN_BYTES:
+        return body, None
+    accepted = _accepted(accept_encoding)
+    if brotli is not None and "br" in accepted:
+        return brotli.compress(body, quality=4), "br"
+    if "gzip" in accepted:
+        return gzip.compress(body, compresslevel=GZIP_LEVEL), "gzip"
+    return body, None
+
+
+def json_response(request: Request, payload: Any, status_code: int = 200) -> Response:
+    body, encoding = compress(dumps(payload), request.headers.get("accept-encoding", ""))
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
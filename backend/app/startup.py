@@ -0,0 +1,111 @@
+"""
+Background warm-up and readiness tracking.
+
+The server starts accepting connections right away (/health is liveness);
+heavy imports and loading the persisted store run in a daemon thread, and
+/ready reports progress until they finish.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app import metrics
+
+# Imported first by app.main, so this approximates process start.
+PROCESS_T0 = time.perf_counter()
+
+_lock = threading.Lock()
+_state: Dict = {
+    "ready": False,
+    "stage": "starting",
+    "stages_done": [],
+    "stages_total": 0,
+    "error": None,
+    "import_s": None,
+    "ready_s": None,
+    "first_request_s": None,
+}
+
+
+def _since_start() -> float:
+    return time.perf_counter() - PROCESS_T0
+
+
+def mark_imported() -> None:
+    with _lock:
+        _state["import_s"] = round(_since_start(), 4)
+    metrics.set_gauge("startup_import_seconds", _state["import_s"])
+
+
+def mark_first_request() -> None:
+    """Record time-to-first-request; cheap no-op after the first call."""
+    if _state["first_request_s"] is not None:
+        return
+    with _lock:
+        if _state["first_request_s"] is not None:
+            return
+        _state["first_request_s"] = round(_since_start(), 4)
+    metrics.set_gauge("startup_first_request_seconds", _state["first_request_s"])
+
+
+class FirstRequestMiddleware:
+    """Pure ASGI hook for time-to-first-request; no request/response wrapping."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            mark_first_request()
+        await self.app(scope, receive, send)
+
+
+def is_ready() -> bool:
+    return _state["ready"]
+
+
+def snapshot() -> Dict:
+    with _lock:
+        out = dict(_state)
+        out["stages_done"] = list(_state["stages_done"])
+    total = out["stages_total"] or 1
+    out["progress"] = round(len(out["stages_done"]) / total, 3)
+    out["uptime_s"] = round(_since_start(), 4)
+    return out
+
+
+def _run(stages: List[Tuple[str, Callable[[], None]]]) -> None:
+    for name, fn in stages:
+        with _lock:
+            _state["stage"] = name
+        t0 = time.perf_counter()
+        try:
+            fn()
+        except Exception as e:  # keep serving; readiness reports the failure
+            with _lock:
+                _state["stage"] = "failed"
+                _state["error"] = f"{name}: {e!r}"
+            return
+        elapsed = time.perf_counter() - t0
+        metrics.set_gauge("startup_stage_seconds", elapsed, stage=name)
+        with _lock:
+            _state["stages_done"].append({"stage": name, "seconds": round(elapsed, 4)})
+
+    with _lock:
+        _state["stage"] = "ready"
+        _state["ready"] = True
+        _state["ready_s"] = round(_since_start(), 4)
+    metrics.set_gauge("startup_ready_seconds", _state["ready_s"])
+
+
+def start_background(stages: List[Tuple[str, Callable[[], None]]]) -> Optional[threading.Thread]:
+    with _lock:
+        _state["stages_total"] = len(stages)
+    if not stages:
+        _run(stages)
+        return None
+    t = threading.Thread(target=_run, args=(stages,), name="startup-warmup", daemon=True)
+    t.start()
+    return t
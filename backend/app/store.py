@@ -1,54 +1,211 @@
 from __future__ import annotations
 
-from typing import List, Dict, Set, Optional, Tuple
+from typing import Any, List, Dict, Set, Optional, Tuple, Iterator, TYPE_CHECKING
 from datetime import datetime, timezone
 import math
 import re
 import os
+import tempfile
+import threading
 
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer, ENGLISH_STOP_WORDS
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.decomposition import TruncatedSVD
+import scipy.sparse as sp
+import joblib
 
 from app.models import Article
+from app import metrics
+from app.segments import UNKNOWN_BUCKET, Segment, bucket_key, merge, sort_key
+from app.knn import KnnGraph, top_k
+from app.stories import StoryClusters
+from app.cursors import CursorCache, encode as encode_cursor
+
+# scikit-learn is imported lazily (see warm_up) so importing app.main stays fast.
+if TYPE_CHECKING:
+    from sklearn.feature_extraction.text import HashingVectorizer
+
+# Fixed hashed feature space shared by every segment (unigrams + bigrams)
+N_FEATURES = 2 ** 20
+
+# kNN graph updates: new documents x corpus rows per sparse product
+KNN_BLOCK = 256
+KNN_CORPUS_BLOCK = 4096
+
+
+def warm_up() -> None:
+    """Import the heavy scikit-learn modules ahead of the first request."""
+    from sklearn.feature_extraction.text import HashingVectorizer  # noqa: F401
+    from sklearn.preprocessing import normalize  # noqa: F401
+    from sklearn.decomposition import TruncatedSVD  # noqa: F401
 
 
 class VectorStore:
     def __init__(self):
-        self.articles: List[Article] = []
-        self._seen_urls: Set[str] = set()
-
-        self._vectorizer = TfidfVectorizer(
-            stop_words="english",
-            max_features=50000,
-            ngram_range=(1, 2),
+        self._seen_urls: Dict[str, int] = {}  # url -> doc id
+        self._docs: Dict[int, Tuple[Article, float]] = {}  # doc id -> (article, published ts)
+        self._hasher: Optional[HashingVectorizer] = None  # created on first use
+
+        # Time-partitioned segments (see app/segments.py); replaced, never mutated
+        self._segments: Tuple[Segment, ...] = ()
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()
+        self._next_id = 0
+
+        # Global document frequencies -> IDF, bumped on every write
+        self._df = np.zeros(N_FEATURES, dtype=np.int32)
+        self._n_docs = 0
+        self._generation = 0
+        self._idf_cache: Optional[Tuple[int, np.ndarray]] = None
+
+        # Compact index: float32 counts/weights/scores (INDEX_COMPACT=1) and
+        # document-frequency pruning. Terms outside [INDEX_MIN_DF docs,
+        # INDEX_MAX_DF fraction of docs] get zero IDF; entries of terms below
+        # INDEX_MIN_DF are also dropped from storage when segments are merged.
+        self.compact = os.getenv("INDEX_COMPACT", "0") == "1"
+        self.dtype = np.float32 if self.compact else np.float64
+        self.min_df = max(1, int(os.getenv("INDEX_MIN_DF", "1")))
+        self.max_df = float(os.getenv("INDEX_MAX_DF", "1.0"))
+
+        # Phase 2: cached 2D map (built lazily per generation)
+        self._map_cache: Optional[Dict[str, Any]] = None
+
+        self.span_days = int(os.getenv("SEGMENT_SPAN_DAYS", "1"))
+        self.merge_runs = int(os.getenv("SEGMENT_MERGE_RUNS", "4"))
+        # Size tiers: runs of a bucket totalling at most SEGMENT_SMALL_DOCS merge
+        # right away; buckets older than SEGMENT_HOT_DAYS fold into
+        # SEGMENT_COLD_SPAN_DAYS segments (days filters rarely reach that far)
+        self.small_docs = int(os.getenv("SEGMENT_SMALL_DOCS", "512"))
+        self.hot_days = float(os.getenv("SEGMENT_HOT_DAYS", "30"))
+        self.cold_span_days = int(os.getenv("SEGMENT_COLD_SPAN_DAYS", "30"))
+        self.background_merge = os.getenv("SEGMENT_BACKGROUND_MERGE", "1") == "1"
+        self._merging = False
+
+        # Retention (0 = unlimited): evict past any of these, oldest first
+        self.max_age_days = float(os.getenv("RETENTION_MAX_AGE_DAYS", "0"))
+        self.max_docs = int(os.getenv("RETENTION_MAX_DOCS", "0"))
+        self.max_bytes = int(float(os.getenv("RETENTION_MAX_MB", "0")) * 1024 * 1024)
+
+        # "More like this": precomputed neighbours per document (KNN_K=0 disables)
+        self.knn_k = int(os.getenv("KNN_K", "20"))
+        self._knn: Optional[KnnGraph] = KnnGraph(self.knn_k) if self.knn_k > 0 else None
+
+        # Story clusters for collapsing near-duplicate coverage of one event
+        self.story_threshold = float(os.getenv("STORY_THRESHOLD", "0.5"))
+        self._stories = StoryClusters(self.story_threshold)
+
+        # Cursor pagination over cached ranked candidate lists
+        self.search_candidates = int(os.getenv("SEARCH_CANDIDATES", "500"))
+        self._cursors = CursorCache(
+            ttl_s=float(os.getenv("SEARCH_CURSOR_TTL_S", "600")),
+            max_entries=int(os.getenv("SEARCH_CURSOR_MAX", "256")),
         )
-        self._matrix = None  # TF-IDF matrix
-
-        # Phase 2: cached 2D map
-        self._svd: Optional[TruncatedSVD] = None
-        self._map_xy: Optional[np.ndarray] = None
 
-    def total(self) -> int:
-        return len(self.articles)
+    @property
+    def _vectorizer(self) -> HashingVectorizer:
+        if self._hasher is None:
+            from sklearn.feature_extraction.text import HashingVectorizer
+
+            # Same analyzer as the previous TfidfVectorizer; raw counts, IDF applied at query time
+            self._hasher = HashingVectorizer(
+                stop_words="english",
+                ngram_range=(1, 2),
+                n_features=N_FEATURES,
+                alternate_sign=False,
+                norm=None,
+                dtype=self.dtype,
+            )
+        return self._hasher
 
-    def add_many(self, new_articles: List[Article]) -> int:
-        added = 0
-        for a in new_articles:
-            if not a.url:
-                continue
-            if a.url in self._seen_urls:
-                continue
-            self._seen_urls.add(a.url)
-            self.articles.append(a)
-            added += 1
+    @property
+    def articles(self) -> List[Article]:
+        return [a for seg in self._segments for a in seg.articles]
 
-        if added > 0:
-            self._rebuild_index()
+    def total(self) -> int:
+        return self._n_docs
+
+    def reset(self):
+        with self._lock:
+            self._seen_urls = {}
+            self._docs = {}
+            self._knn = KnnGraph(self.knn_k) if self.knn_k > 0 else None
+            self._stories = StoryClusters(self.story_threshold)
+            self._segments = ()
+            self._df = np.zeros(N_FEATURES, dtype=np.int32)
+            self._n_docs = 0
+            self._generation += 1
+            self._map_cache = None
+        self._update_index_gauges()
 
+    # -------------------------
+    # Persistence
+    # -------------------------
+    def save(self, path: str) -> None:
+        """Atomically write all articles to path (unique temp file + rename; one writer at a time)."""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._save_lock:
+            payload = {"version": 1, "articles": [a.model_dump() for a in self.articles]}
+            fd, tmp = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+            os.close(fd)
+            try:
+                joblib.dump(payload, tmp)
+                os.replace(tmp, path)
+            except BaseException:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                raise
+
+    def load(self, path: str) -> int:
+        """Load articles saved by save() and rebuild the index. Returns how many were added."""
+        if not os.path.exists(path):
+            return 0
+        payload = joblib.load(path)
+        articles = [Article(**d) for d in payload.get("articles", [])]
+        added = self.add_many(articles)
+        # The whole corpus is known now, so min_df pruning is exact
+        self.prune_rare()
         return added
 
+    def add_many(self, new_articles: List[Article]) -> int:
+        """Index new articles. Returns how many were added and survived retention."""
+        # Articles already past the max age would be evicted right after indexing
+        age_cutoff = None
+        if self.max_age_days > 0:
+            age_cutoff = datetime.now(timezone.utc).timestamp() - self.max_age_days * 86400.0
+
+        with self._lock:
+            fresh: List[Article] = []
+            batch_urls: Set[str] = set()
+            expired = 0
+            for a in new_articles:
+                if not a.url:
+                    continue
+                if a.url in self._seen_urls or a.url in batch_urls:
+                    continue
+                batch_urls.add(a.url)
+                if age_cutoff is not None and self._published_ts(a) < age_cutoff:  # NaN (unknown date) is kept
+                    expired += 1
+                    continue
+                fresh.append(a)
+            if expired:
+                metrics.inc("expired_on_ingest_total", expired)
+
+            if fresh:
+                new_segments = self._write_segments(fresh)
+                gen, idf = self._idf()
+                new_ids = np.concatenate([seg.doc_ids for seg in new_segments])
+                new_w = sp.vstack([self._segment_tfidf(seg, gen, idf) for seg in new_segments], format="csr")
+                self._update_knn(new_ids, new_w, gen, idf)
+                with metrics.span("story_assign"):
+                    self._stories.assign(new_ids, new_w)
+
+        if fresh:
+            self.enforce_retention()
+            self._update_index_gauges()
+            self._maybe_merge()
+
+        # Budget eviction may have dropped some of the new articles again
+        return sum(1 for a in fresh if a.url in self._seen_urls)
+
     # -------------------------
     # Indexing
     # -------------------------
@@ -56,28 +213,527 @@ class VectorStore:
         text = (a.text or "").strip()
         return f"{a.title}\n{text}"
 
-    def _rebuild_index(self):
-        docs = [self._doc_text(a) for a in self.articles]
-        if not docs:
-            self._matrix = None
-            self._svd = None
-            self._map_xy = None
+    def _published_ts(self, a: Article) -> float:
+        dt = self._parse_published_dt(a.published or "")
+        return math.nan if dt is None else dt.timestamp()
+
+    def _write_segments(self, fresh: List[Article]) -> List[Segment]:
+        """Write new articles as one new run per time bucket; older segments are untouched."""
+        groups: Dict[str, List[Tuple[Article, float]]] = {}
+        for a in fresh:
+            ts = self._published_ts(a)
+            groups.setdefault(bucket_key(ts, self.span_days), []).append((a, ts))
+
+        new_segments = []
+        with metrics.span("vectorize"):
+            for bucket, items in groups.items():
+                arts = [a for a, _ in items]
+                counts = self._vectorizer.transform([self._doc_text(a) for a in arts]).tocsr()
+                title_counts = self._vectorizer.transform([a.title for a in arts]).tocsr()
+                ids = np.arange(self._next_id, self._next_id + len(arts), dtype=np.int64)
+                self._next_id += len(arts)
+                for d, (a, ts) in zip(ids.tolist(), items):
+                    self._seen_urls[a.url] = d
+                    self._docs[d] = (a, ts)
+
+                new_segments.append(
+                    Segment(
+                        bucket=bucket,
+                        articles=arts,
+                        doc_ids=ids,
+                        ts=np.array([ts for _, ts in items], dtype=np.float64),
+                        counts=counts,
+                        title_counts=title_counts,
+                    )
+                )
+                self._n_docs += len(arts)
+
+            # rows of a hashed count matrix hold each column at most once
+            touched = np.concatenate([seg.counts.indices for seg in new_segments])
+            df_delta = np.bincount(touched, minlength=N_FEATURES).astype(np.int32)
+            self._df = self._df + df_delta  # copy-on-write; readers may hold the old array
+
+        self._segments = tuple(sorted(self._segments + tuple(new_segments), key=sort_key))
+        self._generation += 1
+        return new_segments
+
+    def _idf(self) -> Tuple[int, np.ndarray]:
+        """Smoothed IDF as in TfidfVectorizer; zero for unseen features so queries ignore them."""
+        with self._lock:
+            gen, df, n = self._generation, self._df, self._n_docs
+            cached = self._idf_cache
+        if cached is not None and cached[0] == gen:
+            return cached
+        idf = np.log((1.0 + n) / (1.0 + df)) + 1.0
+        idf[df == 0] = 0.0
+        if self.min_df > 1:
+            idf[df < self.min_df] = 0.0
+        if self.max_df < 1.0:
+            idf[df > self.max_df * n] = 0.0
+        self._idf_cache = (gen, idf.astype(self.dtype, copy=False))
+        return self._idf_cache
+
+    def _tfidf_rows(self, texts: List[str], idf: np.ndarray) -> sp.csr_matrix:
+        """L2-normalized TF-IDF rows for ad-hoc texts (queries, sentences, titles)."""
+        from sklearn.preprocessing import normalize
+
+        m = self._vectorizer.transform(texts).tocsr()
+        m.data = m.data * idf[m.indices]
+        return normalize(m, copy=False)
+
+    def _segment_tfidf(self, seg: Segment, gen: int, idf: np.ndarray) -> sp.csr_matrix:
+        """L2-normalized TF-IDF rows of a segment under the current IDF."""
+        doc_norms, _ = seg.norms(gen, idf)
+        inv = np.divide(1.0, doc_norms, out=np.zeros_like(doc_norms), where=doc_norms > 0)
+        w = seg.counts.copy()
+        w.data = w.data * idf[w.indices] * np.repeat(inv, np.diff(w.indptr))
+        return w
+
+    # -------------------------
+    # kNN graph ("more like this")
+    # -------------------------
+    def _update_knn(self, new_ids: np.ndarray, new_w: sp.csr_matrix, gen: int, idf: np.ndarray):
+        """
+        Give new documents their k nearest neighbours and offer them to existing
+        documents. Similarities come from sparse products of KNN_CORPUS_BLOCK
+        corpus rows x KNN_BLOCK new rows, with the IDF current at ingest time.
+        """
+        if self._knn is None or new_ids.size == 0:
+            return
+        k = self._knn.k
+
+        with metrics.span("knn_update"):
+            # (features x block) once per block keeps the corpus products cheap
+            blocks = [
+                (lo, new_w[lo : lo + KNN_BLOCK].T.tocsr())
+                for lo in range(0, new_w.shape[0], KNN_BLOCK)
+            ]
+
+            segs = self._segments
+            corpus = sp.vstack([self._segment_tfidf(s, gen, idf) for s in segs], format="csr")
+            corpus_ids = np.concatenate([s.doc_ids for s in segs])
+            first_new = int(new_ids.min())  # doc ids are assigned in increasing order
+
+            best_ids = np.full((new_ids.size, k), -1, dtype=np.int64)
+            best_scores = np.full((new_ids.size, k), -np.inf, dtype=np.float32)
+
+            for c0 in range(0, corpus.shape[0], KNN_CORPUS_BLOCK):
+                chunk = corpus[c0 : c0 + KNN_CORPUS_BLOCK]
+                chunk_ids = corpus_ids[c0 : c0 + KNN_CORPUS_BLOCK]
+                old_rows = np.flatnonzero(chunk_ids < first_new)
+
+                for lo, block_t in blocks:
+                    block_ids = new_ids[lo : lo + block_t.shape[1]]
+                    sims = (chunk @ block_t).toarray().astype(np.float32)  # (corpus rows x block)
+                    sims[sims <= 0] = -np.inf
+                    sims[chunk_ids[:, None] == block_ids[None, :]] = -np.inf  # no self edges
+
+                    # neighbours of the new documents within this chunk
+                    cand_ids, cand_scores = top_k(
+                        np.broadcast_to(chunk_ids, (block_ids.size, chunk_ids.size)),
+                        np.ascontiguousarray(sims.T),
+                        k,
+                    )
+                    rows = slice(lo, lo + block_ids.size)
+                    best_ids[rows], best_scores[rows] = top_k(
+                        np.hstack([best_ids[rows], cand_ids]),
+                        np.hstack([best_scores[rows], cand_scores]),
+                        k,
+                    )
+
+                    # new documents as neighbours of the existing ones
+                    if old_rows.size:
+                        offer_ids, offer_scores = top_k(
+                            np.broadcast_to(block_ids, (old_rows.size, block_ids.size)),
+                            sims[old_rows],
+                            min(k, block_ids.size),
+                        )
+                        self._knn.offer(chunk_ids[old_rows], offer_ids, offer_scores)
+
+            self._knn.set_rows(new_ids, best_ids, best_scores)
+
+    def _doc_tfidf(self, doc_ids: np.ndarray, gen: int, idf: np.ndarray) -> Tuple[np.ndarray, sp.csr_matrix]:
+        """L2-normalized TF-IDF rows of indexed documents, returned as (doc ids, rows) in segment order."""
+        ids, parts = [], []
+        for seg in self._segments:
+            rows = np.flatnonzero(np.isin(seg.doc_ids, doc_ids))
+            if rows.size:
+                ids.append(seg.doc_ids[rows])
+                parts.append(self._segment_tfidf(seg, gen, idf)[rows])
+        if not parts:
+            return np.empty(0, dtype=np.int64), sp.csr_matrix((0, N_FEATURES), dtype=self.dtype)
+        return np.concatenate(ids), sp.vstack(parts, format="csr")
+
+    def _refill_knn(self, doc_ids: np.ndarray):
+        """Recompute the neighbour rows of documents whose neighbours were evicted."""
+        if self._knn is None or doc_ids.size == 0 or not self._segments:
             return
+        k = self._knn.k
+        gen, idf = self._idf()
+
+        with metrics.span("knn_refill"):
+            segs = self._segments
+            corpus = sp.vstack([self._segment_tfidf(s, gen, idf) for s in segs], format="csr")
+            corpus_ids = np.concatenate([s.doc_ids for s in segs])
+            rows = np.flatnonzero(np.isin(corpus_ids, doc_ids))
+            q_ids, q_w = corpus_ids[rows], corpus[rows]
+
+            best_ids = np.full((q_ids.size, k), -1, dtype=np.int64)
+            best_scores = np.full((q_ids.size, k), -np.inf, dtype=np.float32)
+            for lo in range(0, q_ids.size, KNN_BLOCK):
+                block_t = q_w[lo : lo + KNN_BLOCK].T.tocsr()
+                block_ids = q_ids[lo : lo + KNN_BLOCK]
+                out = slice(lo, lo + block_ids.size)
+                for c0 in range(0, corpus.shape[0], KNN_CORPUS_BLOCK):
+                    chunk_ids = corpus_ids[c0 : c0 + KNN_CORPUS_BLOCK]
+                    sims = (corpus[c0 : c0 + KNN_CORPUS_BLOCK] @ block_t).toarray().astype(np.float32)
+                    sims[sims <= 0] = -np.inf
+                    sims[chunk_ids[:, None] == block_ids[None, :]] = -np.inf  # no self edges
+                    cand_ids, cand_scores = top_k(
+                        np.broadcast_to(chunk_ids, (block_ids.size, chunk_ids.size)),
+                        np.ascontiguousarray(sims.T),
+                        k,
+                    )
+                    best_ids[out], best_scores[out] = top_k(
+                        np.hstack([best_ids[out], cand_ids]),
+                        np.hstack([best_scores[out], cand_scores]),
+                        k,
+                    )
+            self._knn.replace_rows(q_ids, best_ids, best_scores)
+        metrics.inc("knn_refilled_rows_total", int(q_ids.size))
+
+    def related(self, url: str, k: int = 8, days: Optional[int] = None, sources: Optional[List[str]] = None) -> Optional[List[Dict]]:
+        """Precomputed nearest neighbours of an indexed URL; None if the URL is unknown."""
+        doc_id = self._seen_urls.get(url)
+        if doc_id is None or self._knn is None:
+            return None
 
-        self._matrix = self._vectorizer.fit_transform(docs)
+        cutoff = self._cutoff_ts(days)
+        ids, scores = self._knn.neighbours(doc_id)
 
-        # Build 2D map cache (Phase 2)
-        try:
-            if self._matrix.shape[0] >= 3:
-                self._svd = TruncatedSVD(n_components=2, random_state=42)
-                xy = self._svd.fit_transform(self._matrix)
-                self._map_xy = xy.astype(float)
+        results = []
+        for d, score in zip(ids.tolist(), scores.tolist()):
+            meta = self._docs.get(d)
+            if meta is None or not math.isfinite(score):
+                continue
+            a, ts = meta
+            if sources and a.source not in sources:
+                continue
+            if cutoff is not None and (math.isnan(ts) or ts < cutoff):
+                continue
+            results.append(
+                {
+                    "title": a.title,
+                    "url": a.url,
+                    "source": a.source,
+                    "summary": (a.summary or "").strip() or "No summary available.",
+                    "score": float(score),
+                    "why": None,
+                }
+            )
+            if len(results) >= k:
+                break
+        return results
+
+    # -------------------------
+    # Segment maintenance (LSM-style merge)
+    # -------------------------
+    def _merge_plan(self, min_runs: int) -> List[Tuple[str, List[Segment]]]:
+        """
+        Groups of segments to merge, each with its target bucket:
+        - runs of one bucket once there are min_runs of them; runs smaller
+          than small_docs documents merge with each other right away;
+        - segments older than hot_days, folded into cold_span_days buckets.
+        """
+        cold_cutoff = datetime.now(timezone.utc).timestamp() - self.hot_days * 86400.0
+        groups: Dict[Tuple[str, bool], List[Segment]] = {}
+        for seg in self._segments:
+            cold = seg.bucket != UNKNOWN_BUCKET and seg.max_ts < cold_cutoff
+            target = bucket_key(seg.max_ts, self.cold_span_days) if cold else seg.bucket
+            groups.setdefault((target, cold), []).append(seg)
+
+        plan = []
+        for (target, cold), segs in groups.items():
+            if len(segs) < 2:
+                continue
+            if cold or len(segs) >= max(2, min_runs):
+                plan.append((target, segs))
+                continue
+            # Only small runs merge early, so a large segment is not rewritten for every new run
+            small = [s for s in segs if len(s) < self.small_docs]
+            if len(small) >= 2:
+                plan.append((target, small))
+        return plan
+
+    def _maybe_merge(self):
+        if not self._merge_plan(self.merge_runs):
+            return
+
+        with self._lock:
+            if self._merging:
+                return
+            self._merging = True
+
+        def run():
+            try:
+                self.merge_segments(min_runs=self.merge_runs)
+            finally:
+                self._merging = False
+
+        if self.background_merge:
+            threading.Thread(target=run, name="segment-merge", daemon=True).start()
+        else:
+            run()
+
+    def merge_segments(self, min_runs: int = 2) -> int:
+        """Apply the merge plan (see _merge_plan). Returns how many groups were merged."""
+        merged_count = 0
+        for bucket, runs in self._merge_plan(min_runs):
+            with metrics.span("segment_merge"):
+                merged = merge(runs, bucket=bucket)
+            with self._lock:
+                current = self._segments
+                # A concurrent reset/eviction may have replaced these runs; drop the result then
+                if not all(any(s is c for c in current) for s in runs):
+                    continue
+                keep = [c for c in current if not any(c is s for s in runs)]
+                if self.min_df > 1:
+                    merged, _ = self._prune_segment(merged)
+                self._segments = tuple(sorted(keep + [merged], key=sort_key))
+            merged_count += 1
+
+        if merged_count:
+            self._update_index_gauges()
+        return merged_count
+
+    def prune_rare(self) -> int:
+        """Drop stored entries of terms below min_df from every segment. Returns entries dropped."""
+        if self.min_df <= 1:
+            return 0
+        with self._lock, metrics.span("prune_rare"):
+            segs, dropped = [], 0
+            for seg in self._segments:
+                seg, n = self._prune_segment(seg)
+                segs.append(seg)
+                dropped += n
+            if dropped:
+                self._segments = tuple(segs)
+        if dropped:
+            self._update_index_gauges()
+        return dropped
+
+    def _prune_segment(self, seg: Segment) -> Tuple[Segment, int]:
+        """
+        Copy of seg without entries of terms whose df is below min_df. Those
+        terms have zero IDF, so scores are unchanged and the generation stays.
+        df keeps counting the dropped entries, so a recurring term still builds
+        up document frequency; once it reaches min_df it is weighted again, but
+        rows pruned earlier stay without it. Caller holds the lock.
+        """
+        rare = self._df < self.min_df
+        drop = rare[seg.counts.indices]
+        title_drop = rare[seg.title_counts.indices]
+        if not drop.any() and not title_drop.any():
+            return seg, 0
+
+        counts, title_counts = seg.counts.copy(), seg.title_counts.copy()
+        counts.data[drop] = 0
+        title_counts.data[title_drop] = 0
+        counts.eliminate_zeros()
+        title_counts.eliminate_zeros()
+        metrics.inc("pruned_entries_total", int(drop.sum() + title_drop.sum()))
+        pruned = Segment(
+            bucket=seg.bucket,
+            articles=seg.articles,
+            doc_ids=seg.doc_ids,
+            ts=seg.ts,
+            counts=counts,
+            title_counts=title_counts,
+            pruned=True,
+        )
+        return pruned, int(drop.sum() + title_drop.sum())
+
+    # -------------------------
+    # Retention & compaction
+    # -------------------------
+    def approx_bytes(self) -> int:
+        """Text + count matrices of all segments plus the kNN graph and story leader rows."""
+        knn = 0 if self._knn is None else self._knn.nbytes
+        return sum(s.approx_bytes for s in self._segments) + knn + self._stories.nbytes
+
+    def _side_bytes_per_doc(self) -> float:
+        """Average per-document share of the kNN graph and story leaders, for the memory budget."""
+        n = self.total()
+        if n == 0:
+            return 0.0
+        knn = 0 if self._knn is None else self._knn.nbytes
+        return (knn + self._stories.nbytes) / n
+
+    def enforce_retention(self) -> int:
+        """
+        Evict articles beyond max age / max docs / memory budget (oldest first)
+        and compact the affected segments. Returns how many were evicted.
+        """
+        if not (self.max_age_days > 0 or self.max_docs > 0 or self.max_bytes > 0):
+            return 0
+        evicted = self._evict_once()
+        # The kNN/story share per document is an average and successor leaders
+        # add rows, so re-check the memory budget a couple of times
+        for _ in range(2):
+            if not (self.max_bytes > 0 and self.approx_bytes() > self.max_bytes):
+                break
+            more = self._evict_once()
+            if not more:
+                break
+            evicted += more
+        return evicted
+
+    def _evict_once(self) -> int:
+        with self._lock, metrics.span("retention"):
+            segs = self._segments
+            evict: Dict[int, np.ndarray] = {}  # segment index -> bool mask of rows to drop
+
+            # 1) Max age: whole segments older than the cutoff go without a row scan
+            if self.max_age_days > 0:
+                cutoff = datetime.now(timezone.utc).timestamp() - self.max_age_days * 86400.0
+                for j, seg in enumerate(segs):
+                    if seg.max_ts < cutoff:
+                        evict[j] = np.ones(len(seg), dtype=bool)
+                    elif seg.min_ts < cutoff:
+                        evict[j] = seg.ts < cutoff  # NaN (unknown date) compares False: kept
+                n_age = sum(int(m.sum()) for m in evict.values())
+                if n_age:
+                    metrics.inc("evicted_total", n_age, reason="age")
+
+            # 2) Max docs / memory budget: drop the oldest survivors (unknown dates first)
+            if self.max_docs > 0 or self.max_bytes > 0:
+                side_bytes = self._side_bytes_per_doc()
+                ts_parts, bytes_parts, owner_parts, row_parts = [], [], [], []
+                for j, seg in enumerate(segs):
+                    alive = ~evict[j] if j in evict else np.ones(len(seg), dtype=bool)
+                    rows = np.flatnonzero(alive)
+                    ts_parts.append(np.nan_to_num(seg.ts[rows], nan=-np.inf))
+                    bytes_parts.append(seg.row_bytes[rows] + side_bytes)
+                    owner_parts.append(np.full(rows.size, j, dtype=np.int32))
+                    row_parts.append(rows)
+
+                if ts_parts:
+                    ts_all = np.concatenate(ts_parts)
+                    order = np.argsort(ts_all, kind="stable")  # oldest first
+                    n_alive = order.size
+
+                    n_drop = max(0, n_alive - self.max_docs) if self.max_docs > 0 else 0
+                    if self.max_bytes > 0:
+                        bytes_oldest_first = np.concatenate(bytes_parts)[order]
+                        # remaining bytes after dropping the first i rows
+                        remaining = bytes_oldest_first.sum() - np.concatenate(([0], np.cumsum(bytes_oldest_first)))
+                        n_drop = max(n_drop, int(np.argmax(remaining <= self.max_bytes)))
+
+                    if n_drop:
+                        owner = np.concatenate(owner_parts)[order[:n_drop]]
+                        local = np.concatenate(row_parts)[order[:n_drop]]
+                        for j, r in zip(owner.tolist(), local.tolist()):
+                            if j not in evict:
+                                evict[j] = np.zeros(len(segs[j]), dtype=bool)
+                            evict[j][r] = True
+                        metrics.inc("evicted_total", n_drop, reason="budget")
+
+            evicted = sum(int(m.sum()) for m in evict.values())
+            if evicted:
+                self._compact(segs, evict)
+
+        if evicted:
+            self._update_index_gauges()
+        return evicted
+
+    def _compact(self, segs: Tuple[Segment, ...], evict: Dict[int, np.ndarray]):
+        """Rebuild segments without evicted rows and retract them from df, urls and caches."""
+        df = self._df.copy()
+        kept: List[Segment] = []
+        evicted_ids: List[np.ndarray] = []
+        for j, seg in enumerate(segs):
+            mask = evict.get(j)
+            if mask is None or not mask.any():
+                kept.append(seg)
+                continue
+
+            drop = np.flatnonzero(mask)
+            if seg.pruned:
+                # Stored rows lack pruned terms that df still counts; recover them from the text
+                gone = self._vectorizer.transform([self._doc_text(seg.articles[int(r)]) for r in drop])
             else:
-                self._svd = None
-                self._map_xy = None
-        except Exception:
-            self._svd = None
-            self._map_xy = None
+                gone = seg.counts[drop]
+            df -= np.bincount(gone.indices, minlength=N_FEATURES).astype(np.int32)
+            for r in drop:
+                self._seen_urls.pop(seg.articles[int(r)].url, None)
+                self._docs.pop(int(seg.doc_ids[int(r)]), None)
+            evicted_ids.append(seg.doc_ids[drop])
+            self._n_docs -= drop.size
+
+            keep_rows = np.flatnonzero(~mask)
+            if keep_rows.size:
+                kept.append(seg.take(keep_rows))
+
+        lost_neighbours = np.empty(0, dtype=np.int64)
+        if evicted_ids:
+            gone = np.concatenate(evicted_ids)
+            if self._knn is not None:
+                lost_neighbours = self._knn.remove(gone)
+            successors = self._stories.remove(gone.tolist())
+        else:
+            successors = {}
+
+        self._df = df
+        self._segments = tuple(sorted(kept, key=sort_key))
+        self._generation += 1
+        self._map_cache = None
+        self._refill_knn(lost_neighbours)
+
+        if successors:
+            # Evicted story leaders hand over to their earliest surviving member
+            gen, idf = self._idf()
+            doc_ids, rows = self._doc_tfidf(np.array(list(successors.values()), dtype=np.int64), gen, idf)
+            cluster_of = {d: c for c, d in successors.items()}
+            self._stories.set_leaders(
+                np.array([cluster_of[int(d)] for d in doc_ids], dtype=np.int64), doc_ids, rows
+            )
+
+    def index_stats(self) -> Dict[str, Any]:
+        """Size of the index: matrix entries/bytes, vocabulary and the side structures."""
+        segs, df = self._segments, self._df
+        _, idf = self._idf()
+        cache = self._map_cache
+        return {
+            "documents": self.total(),
+            "segments": len(segs),
+            "compact": self.compact,
+            "dtype": np.dtype(self.dtype).name,
+            "min_df": self.min_df,
+            "max_df": self.max_df,
+            "vocabulary_size": int(np.count_nonzero(df)),
+            "weighted_vocabulary_size": int(np.count_nonzero(idf)),
+            "matrix_nnz": sum(s.counts.nnz + s.title_counts.nnz for s in segs),
+            "matrix_bytes": sum(s.nbytes for s in segs),
+            "approx_bytes": self.approx_bytes(),
+            "map_bytes": 0 if cache is None else int(cache["xy"].nbytes),
+            "knn_graph_bytes": 0 if self._knn is None else self._knn.nbytes,
+            "story_leader_bytes": self._stories.nbytes,
+        }
+
+    def _update_index_gauges(self):
+        if not metrics.ENABLED:
+            return
+        st = self.index_stats()
+        metrics.set_gauge("index_documents", st["documents"])
+        metrics.set_gauge("index_segments", st["segments"])
+        metrics.set_gauge("index_vocabulary_size", st["vocabulary_size"])
+        metrics.set_gauge("index_weighted_vocabulary_size", st["weighted_vocabulary_size"])
+        metrics.set_gauge("index_matrix_nnz", st["matrix_nnz"])
+        metrics.set_gauge("index_matrix_bytes", st["matrix_bytes"])
+        metrics.set_gauge("index_approx_bytes", st["approx_bytes"])
+        metrics.set_gauge("knn_graph_bytes", st["knn_graph_bytes"])
+        metrics.set_gauge("story_clusters", len(self._stories))
+        metrics.set_gauge("index_map_bytes", st["map_bytes"])
 
     # -------------------------
     # Utilities
@@ -134,9 +790,10 @@ class VectorStore:
             return (a.summary or "").strip() or "No summary available."
 
         try:
-            q_vec = self._vectorizer.transform([query])
-            sent_vecs = self._vectorizer.transform(sents)
-            sent_sims = cosine_similarity(q_vec, sent_vecs).flatten()
+            _, idf = self._idf()
+            q_vec = self._tfidf_rows([query], idf)
+            sent_vecs = self._tfidf_rows(sents, idf)
+            sent_sims = (sent_vecs @ q_vec.T).toarray().ravel()
 
             ranked = sorted(range(len(sents)), key=lambda i: float(sent_sims[i]), reverse=True)
 
@@ -177,29 +834,93 @@ class VectorStore:
                 break
         return out
 
-    def _filter_articles(self, days: Optional[int] = None, sources: Optional[List[str]] = None) -> List[int]:
-        idxs = []
-        for i, a in enumerate(self.articles):
-            if sources and a.source not in sources:
+    def _cutoff_ts(self, days: Optional[int]) -> Optional[float]:
+        if days is None:
+            return None
+        return datetime.now(timezone.utc).timestamp() - days * 86400.0
+
+    def _iter_filtered(
+        self,
+        days: Optional[int] = None,
+        sources: Optional[List[str]] = None,
+        segments: Optional[Tuple[Segment, ...]] = None,
+    ) -> Iterator[Tuple[Segment, np.ndarray]]:
+        """Yield (segment, matching row indices), skipping segments outside the filters."""
+        cutoff = self._cutoff_ts(days)
+        for seg in self._segments if segments is None else segments:
+            if not seg.may_match(cutoff, sources):
+                metrics.inc("segments_pruned_total")
                 continue
-            if days is not None:
-                ad = self._age_days(a)
-                if ad is None or ad > days:
-                    continue
-            idxs.append(i)
-        return idxs
+            mask = seg.row_mask(cutoff, sources)
+            rows = np.arange(len(seg)) if mask is None else np.flatnonzero(mask)
+            if rows.size:
+                yield seg, rows
 
     # -------------------------
     # Search (Phase 1 complete)
     # -------------------------
-    def search(self, query: str, k: int = 8, days: Optional[int] = None, sources: Optional[List[str]] = None) -> List[Dict]:
+    def search(
+        self,
+        query: str,
+        k: int = 8,
+        days: Optional[int] = None,
+        sources: Optional[List[str]] = None,
+        collapse_stories: bool = False,
+    ) -> List[Dict]:
         query = (query or "").strip()
-        if not query or self._matrix is None or self.total() == 0:
+        if not query or self.total() == 0:
             return []
+        _, doc_ids, scores = self._rank(query, k, days=days, sources=sources, collapse_stories=collapse_stories)
+        return self._render(query, doc_ids, scores)
+
+    def search_page(
+        self,
+        query: str,
+        k: int = 8,
+        days: Optional[int] = None,
+        sources: Optional[List[str]] = None,
+        collapse_stories: bool = False,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Dict], Optional[str], int]:
+        """
+        Cursor-paginated search: (results, next cursor, candidates). The first call
+        ranks up to SEARCH_CANDIDATES documents once; pages are served from that list.
+        Raises InvalidCursor if the cursor is malformed, belongs to another
+        query, expired or the index changed (see InvalidCursor.expired).
+        """
+        query = (query or "").strip()
+        key = (query, days, tuple(sorted(sources)) if sources else None, collapse_stories)
 
-        now = datetime.now(timezone.utc)
-        q_vec = self._vectorizer.transform([query])
-        sims = cosine_similarity(q_vec, self._matrix).flatten()
+        if cursor:
+            entry_id, offset, doc_ids, scores = self._cursors.get(cursor, key, self._generation)
+        else:
+            if not query or self.total() == 0:
+                return [], None, 0
+            gen, doc_ids, scores = self._rank(
+                query, self.search_candidates, days=days, sources=sources, collapse_stories=collapse_stories
+            )
+            entry_id, offset = self._cursors.put(key, gen, doc_ids, scores), 0
+
+        end = offset + k
+        next_cursor = encode_cursor(entry_id, end) if end < doc_ids.size else None
+        return self._render(query, doc_ids[offset:end], scores[offset:end]), next_cursor, int(doc_ids.size)
+
+    def _rank(
+        self,
+        query: str,
+        limit: int,
+        days: Optional[int] = None,
+        sources: Optional[List[str]] = None,
+        collapse_stories: bool = False,
+    ) -> Tuple[int, np.ndarray, np.ndarray]:
+        """Score the filtered corpus; returns (generation, doc ids, scores), best first."""
+        now_ts = datetime.now(timezone.utc).timestamp()
+        with metrics.span("query_vectorize"):
+            gen, idf = self._idf()
+            q_vec = self._tfidf_rows([query], idf)
+            # Segments hold raw counts: fold the document-side IDF into a dense query
+            q_w = np.zeros(N_FEATURES, dtype=self.dtype)
+            q_w[q_vec.indices] = q_vec.data * idf[q_vec.indices]
 
         # Tunables
         half_life_days = float(os.getenv("RECENCY_HALF_LIFE_DAYS", "14"))
@@ -209,52 +930,88 @@ class VectorStore:
         recency_base = 1.0 - recency_boost_strength
         title_base = 1.0 - title_boost_strength
 
-        scored: list[Tuple[float, int]] = []
-
-        for i, sim in enumerate(sims):
-            a = self.articles[i]
-
-            if sources and a.source not in sources:
-                continue
-
-            dt = self._parse_published_dt(a.published or "")
-            age_days = None if dt is None else max(0.0, (now - dt).total_seconds() / 86400.0)
-
-            if days is not None:
-                if age_days is None or age_days > days:
-                    continue
-
-            if age_days is None:
-                recency_factor = 0.5
+        all_scores: List[np.ndarray] = []
+        hits: List[Tuple[Segment, np.ndarray]] = []
+
+        with metrics.span("score"):
+            for seg, rows in self._iter_filtered(days=days, sources=sources):
+                doc_norms, title_norms = seg.norms(gen, idf)
+
+                counts = seg.counts[rows] if rows.size < len(seg) else seg.counts
+                titles = seg.title_counts[rows] if rows.size < len(seg) else seg.title_counts
+                dots = counts @ q_w
+                title_dots = titles @ q_w
+
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    sims = np.where(doc_norms[rows] > 0, dots / doc_norms[rows], 0.0)
+                    title_sims = np.where(title_norms[rows] > 0, title_dots / title_norms[rows], 0.0)
+
+                ts = seg.ts[rows]
+                age_days = np.maximum(0.0, (now_ts - ts) / 86400.0)
+                recency_factor = np.where(
+                    np.isnan(ts),
+                    0.5,
+                    np.exp(-math.log(2) * (age_days / max(half_life_days, 1e-6))),
+                )
+
+                recency_multiplier = recency_base + recency_boost_strength * recency_factor
+                title_multiplier = title_base + title_boost_strength * title_sims
+
+                all_scores.append(sims * recency_multiplier * title_multiplier)
+                hits.append((seg, rows))
+
+            if not all_scores:
+                return gen, np.empty(0, dtype=np.int64), np.empty(0)
+
+            scores = np.concatenate(all_scores)
+            owner = np.concatenate([np.full(rows.size, j, dtype=np.int32) for j, (_, rows) in enumerate(hits)])
+            local = np.concatenate([rows for _, rows in hits])
+
+            if collapse_stories:
+                # Best-scoring article of each story, in score order
+                top, seen_stories = [], set()
+                for j in np.argsort(-scores, kind="stable"):
+                    seg = hits[int(owner[j])][0]
+                    story = self._stories.cluster_of(int(seg.doc_ids[int(local[j])]))
+                    if story is not None and story in seen_stories:
+                        continue
+                    seen_stories.add(story)
+                    top.append(int(j))
+                    if len(top) >= limit:
+                        break
+                top = np.array(top, dtype=np.int64)
             else:
-                recency_factor = math.exp(-math.log(2) * (age_days / max(half_life_days, 1e-6)))
-
-            recency_multiplier = recency_base + recency_boost_strength * recency_factor
+                kk = min(limit, scores.size)
+                top = np.argpartition(-scores, kk - 1)[:kk]
+                top = top[np.argsort(-scores[top], kind="stable")]
 
-            # quick title similarity using TF-IDF overlap
-            title_sim = float(cosine_similarity(q_vec, self._vectorizer.transform([a.title])).flatten()[0])
-            title_multiplier = title_base + title_boost_strength * title_sim
-
-            score = float(sim) * recency_multiplier * title_multiplier
-            scored.append((score, i))
-
-        if not scored:
-            return []
-
-        scored.sort(key=lambda x: x[0], reverse=True)
-        top = scored[:k]
+            doc_ids = np.array(
+                [hits[int(owner[j])][0].doc_ids[int(local[j])] for j in top], dtype=np.int64
+            )
+        return gen, doc_ids, scores[top]
 
+    def _render(self, query: str, doc_ids: np.ndarray, scores: np.ndarray) -> List[Dict]:
         results = []
-        for score, i in top:
-            a = self.articles[i]
+        for d, score in zip(doc_ids.tolist(), scores.tolist()):
+            meta = self._docs.get(d)
+            if meta is None:
+                continue
+            a = meta[0]
+            story = self._stories.cluster_of(d)
+            with metrics.span("summarize"):
+                summary = self._extractive_summary(query, a)
+            with metrics.span("why_terms"):
+                why = self._why_terms(query, a)
             results.append(
                 {
                     "title": a.title,
                     "url": a.url,
                     "source": a.source,
-                    "summary": self._extractive_summary(query, a),
+                    "summary": summary,
                     "score": float(score),
-                    "why": self._why_terms(query, a),
+                    "why": why,
+                    "story_id": story,
+                    "story_size": None if story is None else self._stories.size(story),
                 }
             )
         return results
@@ -262,8 +1019,9 @@ class VectorStore:
     # -------------------------
     # Phase 2.1: Trends
     # -------------------------
-    def trends(self, days: int = 7, top_n: int = 12, sources: Optional[List[str]] = None) -> Dict:
-        idxs = self._filter_articles(days=days, sources=sources)
+    def trends(self, days: int = 7, top_n: int = 12, sources: Optional[List[str]] = None, mode: str = "keywords") -> Dict:
+        """mode="stories" ranks story clusters by article count instead of tokenizing keywords."""
+        from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
 
         # by_day
         day_counts: Dict[str, int] = {}
@@ -274,34 +1032,55 @@ class VectorStore:
 
         analyzer = self._vectorizer.build_analyzer()
 
-        for i in idxs:
-            a = self.articles[i]
-
-            # Source counts
-            source_counts[a.source] = source_counts.get(a.source, 0) + 1
-
-            # Day counts
-            dt = self._parse_published_dt(a.published or "")
-            if dt is None:
-                day = "unknown"
-            else:
-                day = dt.date().isoformat()
-            day_counts[day] = day_counts.get(day, 0) + 1
+        # story id -> [count in window, latest ts, latest article]
+        story_counts: Dict[int, list] = {}
+
+        total_items = 0
+        for seg, rows in self._iter_filtered(days=days, sources=sources):
+            for r in rows:
+                a = seg.articles[int(r)]
+                total_items += 1
+
+                if mode == "stories":
+                    story = self._stories.cluster_of(int(seg.doc_ids[int(r)]))
+                    if story is not None:
+                        ts = float(seg.ts[int(r)])
+                        entry = story_counts.get(story)
+                        if entry is None:
+                            story_counts[story] = [1, ts, a]
+                        else:
+                            entry[0] += 1
+                            if ts > entry[1]:
+                                entry[1], entry[2] = ts, a
+
+                # Source counts
+                source_counts[a.source] = source_counts.get(a.source, 0) + 1
+
+                # Day counts
+                ts = float(seg.ts[int(r)])
+                if math.isnan(ts):
+                    day = "unknown"
+                else:
+                    day = datetime.fromtimestamp(ts, tz=timezone.utc).date().isoformat()
+                day_counts[day] = day_counts.get(day, 0) + 1
+
+                if mode == "stories":
+                    continue
 
-            # Keywords (title weighted)
-            title_tokens = analyzer(a.title or "")
-            body_tokens = analyzer((a.text or "")[:2500])  # cap for speed
+                # Keywords (title weighted)
+                title_tokens = analyzer(a.title or "")
+                body_tokens = analyzer((a.text or "")[:2500])  # cap for speed
 
-            # Remove very common stop words + tiny tokens
-            def keep(t: str) -> bool:
-                return len(t) >= 3 and t not in ENGLISH_STOP_WORDS
+                # Remove very common stop words + tiny tokens
+                def keep(t: str) -> bool:
+                    return len(t) >= 3 and t not in ENGLISH_STOP_WORDS
 
-            for t in title_tokens:
-                if keep(t):
-                    kw_counts[t] = kw_counts.get(t, 0) + 2  # title weight
-            for t in body_tokens:
-                if keep(t):
-                    kw_counts[t] = kw_counts.get(t, 0) + 1
+                for t in title_tokens:
+                    if keep(t):
+                        kw_counts[t] = kw_counts.get(t, 0) + 2  # title weight
+                for t in body_tokens:
+                    if keep(t):
+                        kw_counts[t] = kw_counts.get(t, 0) + 1
 
         # Sort outputs
         by_day_sorted = sorted(
@@ -321,47 +1100,129 @@ class VectorStore:
             reverse=True,
         )[:top_n]
 
+        top_stories = [
+            {
+                "story_id": story,
+                "count": count,
+                "title": a.title,
+                "url": a.url,
+                "source": a.source,
+                "published": a.published,
+            }
+            for story, (count, _, a) in sorted(story_counts.items(), key=lambda x: x[1][0], reverse=True)[:top_n]
+        ]
+
         return {
             "days": days,
-            "total_items": len(idxs),
+            "total_items": total_items,
             "by_day": by_day_sorted,
             "top_sources": top_sources,
             "top_keywords": top_keywords,
+            "top_stories": top_stories,
         }
 
     # -------------------------
     # Phase 2.2: Research map
     # -------------------------
-    def map_2d(self, k: int = 150, query: Optional[str] = None, days: Optional[int] = None, sources: Optional[List[str]] = None) -> Dict:
-        if self._map_xy is None or self._svd is None or self._matrix is None:
+    def _ensure_map(self) -> Optional[Dict[str, Any]]:
+        """2D SVD projection of the whole corpus, cached until the next write."""
+        with self._lock:
+            gen, segs = self._generation, self._segments
+            cache = self._map_cache
+        if cache is not None and cache["generation"] == gen:
+            return cache
+        if sum(len(s) for s in segs) < 3:
+            return None
+
+        from sklearn.decomposition import TruncatedSVD
+        from sklearn.preprocessing import normalize
+
+        _, idf = self._idf()
+        try:
+            with metrics.span("svd_fit"):
+                # Only project onto features that occur, keeps the SVD small
+                used = np.flatnonzero(idf > 0)
+                m = sp.vstack([s.counts for s in segs], format="csr")[:, used]
+                m.data = m.data * idf[used][m.indices]
+                m = normalize(m, copy=False)
+                svd = TruncatedSVD(n_components=2, random_state=42)
+                xy = svd.fit_transform(m).astype(self.dtype)
+        except Exception:
+            return None
+
+        doc_ids = np.concatenate([s.doc_ids for s in segs])
+        cache = {
+            "generation": gen,
+            "segments": segs,
+            "svd": svd,
+            "used": used,
+            "xy": xy,
+            "row_of": {int(d): i for i, d in enumerate(doc_ids)},
+        }
+        self._map_cache = cache
+        self._update_index_gauges()
+        return cache
+
+    def map_2d(
+        self,
+        k: int = 150,
+        query: Optional[str] = None,
+        days: Optional[int] = None,
+        sources: Optional[List[str]] = None,
+        layout: str = "rows",
+    ) -> Dict:
+        """layout="columns" returns parallel arrays under "columns" instead of one dict per point."""
+        cache = self._ensure_map()
+        if cache is None:
             return {"points": [], "query_point": None}
 
-        idxs = self._filter_articles(days=days, sources=sources)
-        if not idxs:
+        picked_articles: List[Article] = []
+        map_rows: List[int] = []
+        row_of = cache["row_of"]
+        for seg, rows in self._iter_filtered(days=days, sources=sources, segments=cache["segments"]):
+            for r in rows:
+                picked_articles.append(seg.articles[int(r)])
+                map_rows.append(row_of[int(seg.doc_ids[int(r)])])
+        if not map_rows:
             return {"points": [], "query_point": None}
 
-        xy = self._map_xy[idxs, :]
+        xy = cache["xy"][map_rows, :]
 
         query_point = None
         if query and query.strip():
             try:
-                q_vec = self._vectorizer.transform([query.strip()])
-                q_xy = self._svd.transform(q_vec)[0]
+                _, idf = self._idf()
+                q_vec = self._tfidf_rows([query.strip()], idf)[:, cache["used"]]
+                q_xy = cache["svd"].transform(q_vec)[0]
                 query_point = {"x": float(q_xy[0]), "y": float(q_xy[1])}
 
                 # pick closest in 2D space
                 dists = np.sqrt(((xy - q_xy) ** 2).sum(axis=1))
-                order = np.argsort(dists)[: min(k, len(idxs))]
-                pick = [idxs[int(j)] for j in order]
+                pick = [int(j) for j in np.argsort(dists)[: min(k, len(map_rows))]]
             except Exception:
-                pick = idxs[: min(k, len(idxs))]
+                pick = list(range(min(k, len(map_rows))))
         else:
-            pick = idxs[: min(k, len(idxs))]
+            pick = list(range(min(k, len(map_rows))))
+
+        if layout == "columns":
+            sel = [picked_articles[j] for j in pick]
+            return {
+                "points": [],
+                "columns": {
+                    "x": xy[pick, 0].tolist(),
+                    "y": xy[pick, 1].tolist(),
+                    "title": [a.title for a in sel],
+                    "url": [a.url for a in sel],
+                    "source": [a.source for a in sel],
+                    "published": [a.published for a in sel],
+                },
+                "query_point": query_point,
+            }
 
         points = []
-        for i in pick:
-            a = self.articles[i]
-            x, y = self._map_xy[i]
+        for j in pick:
+            a = picked_articles[j]
+            x, y = xy[j]
             points.append(
                 {
                     "x": float(x),
@@ -0,0 +1,121 @@
+"""
+Online story clustering (leader clustering) over document TF-IDF vectors.
+
+Each cluster is represented by its first document, the leader. A new
+document joins the cluster whose leader is most similar if that cosine
+similarity reaches the threshold (STORY_THRESHOLD), otherwise it becomes
+the leader of a new cluster. Assignment happens once, at ingest, in blocks
+of new documents against the leader matrix. When a leader is evicted while
+its cluster still has members, the earliest surviving member takes over
+(remove() names it; the store supplies its row through set_leaders()).
+"""
+from __future__ import annotations
+
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import scipy.sparse as sp
+
+BLOCK = 256
+
+
+class StoryClusters:
+    def __init__(self, threshold: float = 0.5):
+        self.threshold = threshold
+        self._of: Dict[int, int] = {}  # doc id -> cluster id
+        self._size: Dict[int, int] = {}  # cluster id -> live members
+        self._leaders: Optional[sp.csr_matrix] = None  # one L2-normalized row per cluster
+        self._leader_cluster = np.empty(0, dtype=np.int64)
+        self._leader_doc = np.empty(0, dtype=np.int64)
+        self._next = 0
+
+    def __len__(self) -> int:
+        return len(self._size)
+
+    @property
+    def nbytes(self) -> int:
+        m = self._leaders
+        base = self._leader_cluster.nbytes + self._leader_doc.nbytes
+        return base if m is None else base + m.data.nbytes + m.indices.nbytes + m.indptr.nbytes
+
+    def cluster_of(self, doc_id: int) -> Optional[int]:
+        return self._of.get(int(doc_id))
+
+    def size(self, cluster_id: int) -> int:
+        return self._size.get(int(cluster_id), 0)
+
+    def assign(self, doc_ids: np.ndarray, rows: sp.csr_matrix):
+        """Assign new documents (L2-normalized TF-IDF rows, same order as doc_ids)."""
+        for lo in range(0, rows.shape[0], BLOCK):
+            block = rows[lo : lo + BLOCK]
+            block_ids = doc_ids[lo : lo + BLOCK]
+            block_t = block.T.tocsr()
+
+            if self._leaders is not None and self._leaders.shape[0]:
+                to_leaders = (self._leaders @ block_t).toarray().T  # (block x leaders)
+            else:
+                to_leaders = np.zeros((block.shape[0], 0))
+            within = (block @ block_t).toarray()  # for leaders created inside this block
+
+            new_leaders = []  # block rows that started a cluster
+            for i, d in enumerate(block_ids.tolist()):
+                sims = to_leaders[i]
+                clusters = self._leader_cluster
+                if new_leaders:
+                    sims = np.concatenate([sims, within[i, new_leaders]])
+                    clusters = np.concatenate([clusters, [self._of[int(block_ids[r])] for r in new_leaders]])
+
+                j = int(np.argmax(sims)) if sims.size else -1
+                if j >= 0 and sims[j] >= self.threshold:
+                    cid = int(clusters[j])
+                else:
+                    cid = self._next
+                    self._next += 1
+                    new_leaders.append(i)
+
+                self._of[int(d)] = cid
+                self._size[cid] = self._size.get(cid, 0) + 1
+
+            if new_leaders:
+                new_cids = np.array([self._of[int(block_ids[r])] for r in new_leaders], dtype=np.int64)
+                self.set_leaders(new_cids, block_ids[new_leaders], block[new_leaders])
+
+    def set_leaders(self, cluster_ids: np.ndarray, doc_ids: np.ndarray, rows: sp.csr_matrix):
+        """Add leader rows (L2-normalized TF-IDF, same order as cluster_ids/doc_ids)."""
+        self._leaders = rows if self._leaders is None else sp.vstack([self._leaders, rows], format="csr")
+        self._leader_cluster = np.concatenate([self._leader_cluster, np.asarray(cluster_ids, dtype=np.int64)])
+        self._leader_doc = np.concatenate([self._leader_doc, np.asarray(doc_ids, dtype=np.int64)])
+
+    def remove(self, doc_ids: Iterable[int]) -> Dict[int, int]:
+        """
+        Forget documents and drop the leader rows of evicted leaders. Returns
+        {cluster id: new leader doc id} for clusters that still have members
+        and need a replacement row via set_leaders().
+        """
+        gone = set()
+        for d in doc_ids:
+            cid = self._of.pop(int(d), None)
+            if cid is None:
+                continue
+            gone.add(int(d))
+            self._size[cid] -= 1
+            if self._size[cid] <= 0:
+                del self._size[cid]
+
+        if not gone or self._leaders is None:
+            return {}
+        lost = np.isin(self._leader_doc, list(gone))
+        if not lost.any():
+            return {}
+
+        orphaned = {int(c) for c in self._leader_cluster[lost] if int(c) in self._size}
+        keep = np.flatnonzero(~lost)
+        self._leaders = self._leaders[keep]
+        self._leader_cluster = self._leader_cluster[keep]
+        self._leader_doc = self._leader_doc[keep]
+
+        successors: Dict[int, int] = {}
+        for d, cid in self._of.items():
+            if cid in orphaned and (cid not in successors or d < successors[cid]):
+                successors[cid] = d
+        return successors
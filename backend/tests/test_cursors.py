@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from app.cursors import CursorCache, InvalidCursor, encode
+
+
+def _cache():
+    cache = CursorCache(ttl_s=60, max_entries=4)
+    entry_id = cache.put(("q",), 1, np.arange(3), np.ones(3))
+    return cache, encode(entry_id, 1)
+
+
+def test_generation_change_is_expired():
+    cache, cursor = _cache()
+    with pytest.raises(InvalidCursor) as exc:
+        cache.get(cursor, ("q",), 2)
+    assert exc.value.expired
+
+
+def test_other_query_and_garbage_are_client_errors():
+    cache, cursor = _cache()
+    with pytest.raises(InvalidCursor) as exc:
+        cache.get(cursor, ("other",), 1)
+    assert not exc.value.expired
+    with pytest.raises(InvalidCursor) as exc:
+        cache.get("garbage!!", ("q",), 1)
+    assert not exc.value.expired
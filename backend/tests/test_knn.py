@@ -0,0 +1,19 @@
+import numpy as np
+
+from app.knn import KnnGraph
+
+
+def test_remove_reports_rows_that_lost_neighbours():
+    g = KnnGraph(k=2)
+    g.set_rows(
+        np.array([0, 1, 2, 3]),
+        np.array([[1, 2], [0, 2], [0, 1], [2, 1]]),
+        np.array([[0.9, 0.5], [0.9, 0.4], [0.5, 0.4], [0.3, 0.2]], dtype=np.float32),
+    )
+    lost = g.remove([0])
+    assert sorted(lost.tolist()) == [1, 2]
+    assert g.neighbours(1)[0].tolist() == [2]
+
+    g.replace_rows(np.array([1]), np.array([[2, 3]]), np.array([[0.4, 0.1]], dtype=np.float32))
+    assert g.neighbours(1)[0].tolist() == [2, 3]
+    assert g.neighbours(3)[0].tolist() == [2, 1]
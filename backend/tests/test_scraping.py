@@ -0,0 +1,79 @@
+import gzip
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.scraping import FetchError, _fetch
+
+BODY = b"<rss>" + b"x" * 20000 + b"</rss>"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/drip":
+            # Known Content-Length, 100 bytes every 0.3s: never trips the read timeout
+            self.send_response(200)
+            self.send_header("Content-Length", "100000")
+            self.end_headers()
+            try:
+                for _ in range(1000):
+                    self.wfile.write(b" " * 100)
+                    self.wfile.flush()
+                    time.sleep(0.3)
+            except OSError:
+                pass
+        elif self.path == "/gzip":
+            data = gzip.compress(BODY)
+            self.send_response(200)
+            self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        elif self.path == "/lower":
+            self.send_response(200)
+            self.send_header("content-type", "application/rss+xml; charset=windows-1252")
+            self.send_header("Content-Length", str(len(BODY)))
+            self.end_headers()
+            self.wfile.write(BODY)
+        else:
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(BODY)))
+            self.end_headers()
+            self.wfile.write(BODY)
+
+
+@pytest.fixture(scope="module")
+def server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    srv.daemon_threads = True
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+
+
+def test_fetch_reads_body(server):
+    body, url, _ = _fetch(f"{server}/plain", (2, 2), 5)
+    assert body == BODY
+    assert url.endswith("/plain")
+
+
+def test_fetch_decodes_gzip(server):
+    body, _, _ = _fetch(f"{server}/gzip", (2, 2), 5)
+    assert body == BODY
+
+
+def test_slow_drip_stops_at_deadline(server):
+    start = time.monotonic()
+    with pytest.raises(FetchError, match="deadline"):
+        _fetch(f"{server}/drip", (2, 5), 1.0)
+    assert time.monotonic() - start < 1.5
+
+
+def test_fetch_headers_are_case_insensitive(server):
+    _, _, headers = _fetch(f"{server}/lower", (2, 2), 5)
+    assert headers.get("Content-Type") == "application/rss+xml; charset=windows-1252"
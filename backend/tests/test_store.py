@@ -0,0 +1,49 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+from app.models import Article
+from app.store import VectorStore
+
+WORDS = "model agent llm training inference gpu safety alignment eval benchmark robot vision speech graph".split()
+
+
+def _articles(n, days, seed=0):
+    rnd = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    return [
+        Article(
+            title=" ".join(rnd.sample(WORDS, 3)) + f" {i}",
+            url=f"http://x/{i}",
+            source=rnd.choice("ABC"),
+            published=(now - timedelta(days=rnd.uniform(0, days))).isoformat(),
+            text=". ".join(" ".join(rnd.sample(WORDS, 8)) + " and more words here" for _ in range(4)),
+        )
+        for i in range(n)
+    ]
+
+
+def _store(merge):
+    s = VectorStore()
+    s.background_merge = False
+    s.knn_k = 0
+    s._knn = None
+    if not merge:
+        s.merge_runs = 10 ** 9
+        s.small_docs = 0
+        s.hot_days = 10 ** 9
+    return s
+
+
+def test_tiered_merges_keep_rankings():
+    arts = _articles(600, days=180)
+    merged, plain = _store(True), _store(False)
+    for i in range(0, len(arts), 50):
+        merged.add_many(arts[i : i + 50])
+        plain.add_many(arts[i : i + 50])
+
+    # cold buckets fold into ~30-day segments, hot days keep one segment each
+    assert len(merged._segments) < len(plain._segments) / 3
+    for query, days in [("llm agent", None), ("gpu safety", 7), ("robot vision", 90)]:
+        a = merged.search(query, k=8, days=days)
+        b = plain.search(query, k=8, days=days)
+        assert [r["url"] for r in a] == [r["url"] for r in b]
@@ -0,0 +1,23 @@
+import numpy as np
+import scipy.sparse as sp
+
+from app.stories import StoryClusters
+
+
+def test_evicted_leader_hands_over_to_earliest_member():
+    rows = sp.csr_matrix(np.array([[1.0, 0.0], [0.99, 0.14], [0.98, 0.2], [0.0, 1.0]]))
+    sc = StoryClusters(threshold=0.5)
+    sc.assign(np.array([0, 1, 2, 3]), rows)
+    story = sc.cluster_of(0)
+    assert sc.cluster_of(1) == sc.cluster_of(2) == story
+    assert sc.cluster_of(3) != story
+
+    successors = sc.remove([0])
+    assert successors == {story: 1}
+    sc.set_leaders(np.array([story]), np.array([1]), rows[1])
+    assert len(sc) == 2 and sc.size(story) == 2
+
+    # a new near-duplicate still joins the old story
+    sc.assign(np.array([4]), sp.csr_matrix(np.array([[0.97, 0.24]])))
+    assert sc.cluster_of(4) == story
+    assert sc.remove([3]) == {}